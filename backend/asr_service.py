@@ -2,6 +2,9 @@ import azure.cognitiveservices.speech as speechsdk
 from azure_auth import AzureAuth
 from azure.cognitiveservices.speech import CancellationDetails
 import asyncio
+from log import get_logger
+
+logger = get_logger(__name__)
 
 class AzureASRService:
     """
@@ -14,10 +17,11 @@ class AzureASRService:
         self.region = azure_auth.speech_region
         self.language = language
 
-    def create_streaming_recognizer(self, on_recognized):
+    def create_streaming_recognizer(self, on_recognized, on_recognizing=None):
         """
         Creates a persistent push stream and recognizer for streaming audio.
-        Registers the provided callback for recognized text.
+        Registers the provided callback for recognized text, and optionally `on_recognizing`
+        for partial hypotheses of the utterance in progress.
         Returns (push_stream, recognizer).
         """
         speech_config = speechsdk.SpeechConfig(subscription=self.speech_key, region=self.region)
@@ -30,10 +34,17 @@ class AzureASRService:
             if evt.result.reason == speechsdk.ResultReason.RecognizedSpeech and text:
                 on_recognized(text)
             elif evt.result.reason == speechsdk.ResultReason.Canceled:
-                print("Speech Recognition canceled: {}".format(evt.result.cancellation_details.reason))
-                print("Error details: {}".format(evt.result.cancellation_details.error_details))
+                logger.warning("Speech Recognition canceled: %s", evt.result.cancellation_details.reason)
+                logger.warning("Error details: %s", evt.result.cancellation_details.error_details)
             elif evt.result.reason != speechsdk.ResultReason.NoMatch:
-                print("Speech Recognition failed: {}".format(evt.result.reason))
+                logger.warning("Speech Recognition failed: %s", evt.result.reason)
+
+        def recognizing_handler(evt):
+            text = getattr(evt.result, 'text', '')
+            if evt.result.reason == speechsdk.ResultReason.RecognizingSpeech and text:
+                on_recognizing(text)
 
         recognizer.recognized.connect(recognized_handler)
+        if on_recognizing:
+            recognizer.recognizing.connect(recognizing_handler)
         return push_stream, recognizer
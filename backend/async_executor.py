@@ -0,0 +1,39 @@
+"""
+async_executor.py
+Runs blocking cloud SDK calls off the asyncio event loop on a bounded thread pool.
+"""
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from log import get_logger
+
+logger = get_logger(__name__)
+
+
+class BlockingCallExecutor:
+    """
+    Bounded thread pool for the blocking Translator (requests) and TTS (Speech SDK) calls,
+    so that audio ingest and listener fan-out keep running while a cloud call is in flight.
+    """
+    def __init__(self, max_workers: int):
+        """
+        Create the pool; at most `max_workers` blocking calls run at the same time.
+        """
+        self.max_workers = max_workers
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hsg-blocking")
+        logger.info("Initialized with %s workers", max_workers)
+
+    async def run(self, func, *args, **kwargs):
+        """
+        Run `func(*args, **kwargs)` on the pool and await its result without blocking the loop.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, functools.partial(func, *args, **kwargs))
+
+    def shutdown(self, wait: bool = True):
+        """
+        Stop accepting work and release the worker threads.
+        """
+        self._pool.shutdown(wait=wait)
+        logger.info("Shut down")
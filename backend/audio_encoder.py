@@ -0,0 +1,124 @@
+"""
+audio_encoder.py
+Compresses TTS PCM once per language before fan-out, so every listener shares the same encoded frames.
+"""
+
+from typing import List
+import config
+
+# TTS output format (Raw16Khz16BitMonoPcm)
+SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2
+BYTES_PER_SECOND = SAMPLE_RATE * SAMPLE_WIDTH
+
+
+class PcmEncoder:
+    """
+    Pass-through encoder: listeners receive the raw 16 kHz 16-bit mono PCM (~256 kbps).
+    """
+    codec = "pcm"
+    content_type = "audio/L16;rate=16000;channels=1"
+
+    def encode(self, pcm: bytes) -> List[bytes]:
+        return [pcm] if pcm else []
+
+    def flush(self) -> List[bytes]:
+        return []
+
+    def frame_seconds(self, frame: bytes) -> float:
+        return len(frame) / BYTES_PER_SECOND
+
+
+class OpusEncoder:
+    """
+    Encodes PCM into raw Opus packets of `frame_ms` each (~24 kbps, about a tenth of PCM).
+    Each packet is sent as its own message and can be decoded independently of the container,
+    e.g. with WebCodecs AudioDecoder. Requires the optional `opuslib` package and libopus.
+    """
+    codec = "opus"
+    content_type = "audio/opus"
+
+    def __init__(self, bitrate: int = config.OPUS_BITRATE, frame_ms: int = 20):
+        try:
+            import opuslib
+        except Exception as e:
+            raise RuntimeError("HSG_OUTPUT_CODEC=opus requires the 'opuslib' package and libopus") from e
+        self._encoder = opuslib.Encoder(SAMPLE_RATE, 1, opuslib.APPLICATION_VOIP)
+        self._encoder.bitrate = bitrate
+        self.frame_samples = SAMPLE_RATE * frame_ms // 1000
+        self._frame_bytes = self.frame_samples * SAMPLE_WIDTH
+        self._pending = b""
+
+    def encode(self, pcm: bytes) -> List[bytes]:
+        data = self._pending + bytes(pcm)
+        cut = len(data) - len(data) % self._frame_bytes
+        self._pending = data[cut:]
+        return [self._encoder.encode(data[i:i + self._frame_bytes], self.frame_samples)
+                for i in range(0, cut, self._frame_bytes)]
+
+    def flush(self) -> List[bytes]:
+        # Pad the sentence tail with silence to a whole frame rather than holding it for the next sentence
+        if not self._pending:
+            return []
+        frame = self._pending.ljust(self._frame_bytes, b"\0")
+        self._pending = b""
+        return [self._encoder.encode(frame, self.frame_samples)]
+
+    def frame_seconds(self, frame: bytes) -> float:
+        # Every packet holds one whole frame, including a padded sentence tail
+        return self.frame_samples / SAMPLE_RATE
+
+
+class Mp3Encoder:
+    """
+    Encodes PCM into MPEG-1/2 Layer III frames (default 32 kbps). Requires the optional `lameenc` package.
+    """
+    codec = "mp3"
+    content_type = "audio/mpeg"
+
+    def __init__(self, bitrate_kbps: int = config.MP3_BITRATE_KBPS):
+        try:
+            import lameenc
+        except Exception as e:
+            raise RuntimeError("HSG_OUTPUT_CODEC=mp3 requires the 'lameenc' package") from e
+        self._lameenc = lameenc
+        self.bitrate_kbps = bitrate_kbps
+        self._encoder = self._new_encoder()
+
+    def _new_encoder(self):
+        encoder = self._lameenc.Encoder()
+        encoder.set_bit_rate(self.bitrate_kbps)
+        encoder.set_in_sample_rate(SAMPLE_RATE)
+        encoder.set_channels(1)
+        encoder.set_quality(7)  # fast; speech does not need the slow psychoacoustic passes
+        return encoder
+
+    def encode(self, pcm: bytes) -> List[bytes]:
+        data = self._encoder.encode(bytes(pcm))
+        return [bytes(data)] if data else []
+
+    def flush(self) -> List[bytes]:
+        # LAME holds back up to a frame of samples; flush at sentence end and start a fresh stream
+        data = self._encoder.flush()
+        self._encoder = self._new_encoder()
+        return [bytes(data)] if data else []
+
+    def frame_seconds(self, frame: bytes) -> float:
+        # Constant bitrate: the playing time of a chunk of frames follows from its size
+        return len(frame) * 8 / (self.bitrate_kbps * 1000)
+
+
+ENCODERS = {
+    PcmEncoder.codec: PcmEncoder,
+    OpusEncoder.codec: OpusEncoder,
+    Mp3Encoder.codec: Mp3Encoder,
+}
+
+
+def create_encoder(codec: str = config.OUTPUT_CODEC):
+    """
+    Build a stateful encoder for one language's stream; encoders must not be shared across languages.
+    """
+    if codec not in ENCODERS:
+        raise ValueError(f"Unknown output codec: {codec} (expected one of {', '.join(ENCODERS)})")
+    return ENCODERS[codec]()
@@ -1,25 +1,293 @@
 import asyncio
+import collections
+import itertools
+import time
+from typing import Tuple
+import config
+
+# Overflow policies for a listener whose queue exceeds its byte or lag limit
+DROP_OLDEST = "drop_oldest"
+DROP_TO_LATEST_SENTENCE = "drop_to_latest_sentence"
+DISCONNECT = "disconnect"
+POLICIES = (DROP_OLDEST, DROP_TO_LATEST_SENTENCE, DISCONNECT)
+
+# Where a new listener starts: the live edge, the start of the latest sentence, or N seconds back
+START_LIVE = "live"
+START_SENTENCE = "sentence"
+START_REWIND = "rewind"
+START_MODES = (START_LIVE, START_SENTENCE, START_REWIND)
+
+
+class ListenerDisconnected(Exception):
+    """
+    Raised by ListenerQueue.get() once a listener fell too far behind under the disconnect policy.
+    """
+
+
+class ListenerQueue:
+    """
+    Bounded audio queue for one listener. Memory stays flat however slow the listener is:
+    once queued audio exceeds `max_bytes` or the oldest chunk is older than `max_lag_seconds`,
+    the overflow `policy` drops audio or disconnects the listener. Audio replayed for a late joiner
+    raises both limits by its own size and duration until it has left the queue.
+    """
+    def __init__(self, policy: str = config.LISTENER_QUEUE_POLICY,
+                 max_bytes: int = config.LISTENER_QUEUE_MAX_BYTES,
+                 max_lag_seconds: float = config.LISTENER_MAX_LAG_SECONDS):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown listener queue policy: {policy}")
+        self.policy = policy
+        self.max_bytes = max_bytes
+        self.max_lag_seconds = max_lag_seconds
+        self.queued_bytes = 0
+        self.dropped_chunks = 0
+        self.dropped_bytes = 0
+        self.closed_reason = None
+        self.last_seq = None  # sentence of the chunk most recently returned by get()
+        self.last_seconds = 0.0  # and its duration
+        self.last_replayed = False  # and whether it was history rather than live audio
+        self._items = collections.deque()  # (audio_bytes, seq, enqueued_at, seconds, replayed)
+        self._replay_bytes = 0  # allowance for replayed audio still queued
+        self._replay_seconds = 0.0
+        self._ready = asyncio.Event()
+
+    def put_nowait(self, audio_bytes: bytes, seq=None, seconds: float = 0.0):
+        """
+        Enqueue a chunk of sentence `seq`, applying the overflow policy if a limit is exceeded.
+        """
+        if self.closed_reason:
+            return
+        self._items.append((audio_bytes, seq, time.monotonic(), seconds, False))
+        self.queued_bytes += len(audio_bytes)
+        if self._exceeded():
+            self._overflow()
+        self._ready.set()
+
+    async def get(self) -> bytes:
+        """
+        Wait for the next chunk; raises ListenerDisconnected once the queue was closed by policy.
+        """
+        while not self._items:
+            if self.closed_reason:
+                raise ListenerDisconnected(self.closed_reason)
+            self._ready.clear()
+            await self._ready.wait()
+        audio_bytes, self.last_seq, _, self.last_seconds, self.last_replayed = self._popleft()
+        return audio_bytes
+
+    def lag_seconds(self) -> float:
+        """
+        How far this listener is behind live: the time the oldest queued chunk has been waiting.
+        """
+        return time.monotonic() - self._items[0][2] if self._items else 0.0
+
+    def _popleft(self):
+        item = self._items.popleft()
+        audio_bytes, _, _, seconds, replayed = item
+        self.queued_bytes -= len(audio_bytes)
+        if replayed:
+            self._replay_bytes -= len(audio_bytes)
+            self._replay_seconds -= seconds
+        return item
+
+    def _drop_left(self):
+        audio_bytes = self._popleft()[0]
+        self.dropped_chunks += 1
+        self.dropped_bytes += len(audio_bytes)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def replay(self, frames):
+        """
+        Queue already-broadcast (frame, seq, frame seconds) items for a late joiner. The limits
+        grow by the replayed amount while it is queued, since being that far behind live is what the listener
+        asked for; each replayed frame takes its share of the allowance with it when it leaves the queue.
+        """
+        for audio_bytes, seq, frame_seconds in frames:
+            self._items.append((audio_bytes, seq, time.monotonic(), frame_seconds, True))
+            self.queued_bytes += len(audio_bytes)
+            self._replay_bytes += len(audio_bytes)
+            self._replay_seconds += frame_seconds
+        if frames:
+            self._ready.set()
+
+    def close(self, reason: str):
+        """
+        Stop accepting audio; a pending get() raises ListenerDisconnected once the queue is empty.
+        """
+        self.closed_reason = reason
+        self._ready.set()
+
+    def _exceeded(self) -> bool:
+        return (self.queued_bytes > self.max_bytes + self._replay_bytes
+                or self.lag_seconds() > self.max_lag_seconds + self._replay_seconds)
+
+    def _over_limit(self) -> bool:
+        return len(self._items) > 1 and self._exceeded()
+
+    def _overflow(self):
+        if self.policy == DISCONNECT:
+            self.closed_reason = f"listener fell {self.lag_seconds():.1f}s / {self.queued_bytes} bytes behind"
+            while self._items:
+                self._drop_left()
+            return
+        if self.policy == DROP_TO_LATEST_SENTENCE:
+            # Skip to the start of the newest sentence in the queue
+            latest = self._items[-1][1]
+            while self._items and self._items[0][1] != latest:
+                self._drop_left()
+        # Drop oldest chunks until back within limits (also covers one oversized sentence)
+        while self._over_limit():
+            self._drop_left()
+
+    def stats(self) -> dict:
+        return {
+            'policy': self.policy,
+            'queued_bytes': self.queued_bytes,
+            'queued_chunks': len(self._items),
+            'lag_seconds': round(self.lag_seconds(), 3),
+            'dropped_chunks': self.dropped_chunks,
+            'dropped_bytes': self.dropped_bytes,
+            'disconnected': bool(self.closed_reason),
+        }
+
+
+class AudioHistory:
+    """
+    Ring buffer of the last `max_seconds` of encoded audio of one language, kept as whole sentences
+    so replays start on a sentence boundary. Oldest sentences are evicted once the rest still cover
+    `max_seconds`, or while the history exceeds `max_bytes`; the current sentence is always kept.
+    Sentences whose last audio arrived more than `max_age` seconds ago are expired before a replay,
+    so a listener joining after a long pause starts live instead of hearing stale speech.
+    """
+    def __init__(self, max_seconds: float = config.LATE_JOIN_HISTORY_SECONDS,
+                 max_bytes: int = config.LATE_JOIN_HISTORY_MAX_BYTES,
+                 max_age: float = config.LATE_JOIN_MAX_AGE_SECONDS):
+        self.max_seconds = max_seconds
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._sentences = collections.deque()  # [seq, [(frame, seconds)], seconds, bytes, arrived_at]
+        self.seconds = 0.0
+        self.bytes = 0
+
+    def append(self, frame: bytes, seq, seconds: float, now: float = None):
+        now = now or time.monotonic()
+        if not self._sentences or self._sentences[-1][0] != seq:
+            self._sentences.append([seq, [], 0.0, 0, now])
+        sentence = self._sentences[-1]
+        sentence[1].append((frame, seconds))
+        sentence[2] += seconds
+        sentence[3] += len(frame)
+        sentence[4] = now
+        self.seconds += seconds
+        self.bytes += len(frame)
+        while len(self._sentences) > 1 and (self.seconds - self._sentences[0][2] >= self.max_seconds
+                                            or self.bytes > self.max_bytes):
+            self._evict()
+
+    def _evict(self):
+        _, _, evicted_seconds, evicted_bytes, _ = self._sentences.popleft()
+        self.seconds -= evicted_seconds
+        self.bytes -= evicted_bytes
+
+    def expire(self, now: float = None):
+        """
+        Drop sentences whose last audio arrived more than `max_age` seconds ago.
+        """
+        now = now or time.monotonic()
+        while self._sentences and now - self._sentences[0][4] > self.max_age:
+            self._evict()
+
+    def replay(self, start: str, seconds: float = 0.0) -> Tuple[list, float]:
+        """
+        (frame, seq, frame seconds) items for a listener joining now, and their duration: nothing for START_LIVE,
+        the latest sentence for START_SENTENCE, and for START_REWIND whole sentences going back
+        at least `seconds` (as far as the history reaches).
+        """
+        self.expire()
+        if start == START_LIVE or not self._sentences:
+            return [], 0.0
+        chosen, covered = [], 0.0
+        for sentence in reversed(self._sentences):
+            chosen.append(sentence)
+            covered += sentence[2]
+            if start == START_SENTENCE or covered >= seconds:
+                break
+        return [(frame, seq, frame_seconds) for seq, frames, _, _, _ in reversed(chosen)
+                for frame, frame_seconds in frames], covered
+
+    def stats(self) -> dict:
+        return {'sentences': len(self._sentences), 'seconds': round(self.seconds, 1), 'bytes': self.bytes}
+
 
 class BroadcastManager:
+    """
+    Fans TTS audio out to listener queues, grouped by the language each listener selected.
+    Listeners are kept in a registry keyed by connection id, so register/unregister are O(1).
+    Broadcasts iterate an immutable per-language snapshot that is rebuilt only after membership
+    changes (copy-on-write), so the per-chunk path takes no lock and copies nothing.
+    Each language also keeps an AudioHistory, so late joiners can start from the latest sentence
+    or rewind, served from memory.
+    """
     def __init__(self):
-        self.clients = set()  # Set of (websocket, queue) pairs
-        self._lock = asyncio.Lock()
+        self._listeners = {}  # language -> {connection id: ListenerQueue}
+        self._snapshots = {}  # language -> tuple of ListenerQueue, dropped on membership change
+        self._connections = {}  # websocket -> (language, connection id)
+        self._next_id = itertools.count(1)
+        self._history = {}  # language -> AudioHistory
 
-    async def register(self, websocket):
-        queue = asyncio.Queue()
-        async with self._lock:
-            self.clients.add((websocket, queue))
+    async def register(self, websocket, language: str = config.DEFAULT_LANGUAGE, policy: str = config.LISTENER_QUEUE_POLICY,
+                       start: str = config.LATE_JOIN_START, seconds: float = 0.0):
+        """
+        Add a listener. `start` selects what it hears first (see START_MODES); with START_REWIND,
+        `seconds` of history are replayed before live audio.
+        """
+        queue = ListenerQueue(policy=policy)
+        if language in self._history:
+            frames, _ = self._history[language].replay(start, seconds)
+            queue.replay(frames)
+        connection_id = next(self._next_id)
+        self._listeners.setdefault(language, {})[connection_id] = queue
+        self._connections[websocket] = (language, connection_id)
+        self._snapshots.pop(language, None)
         return queue
 
-    async def unregister(self, websocket):
-        async with self._lock:
-            self.clients = { (ws, q) for (ws, q) in self.clients if ws != websocket }
-
-    async def broadcast_audio(self, audio_bytes: bytes):
-        async with self._lock:
-            for ws, queue in self.clients:
-                # Queue audio for each client
-                try:
-                    queue.put_nowait(audio_bytes)
-                except Exception:
-                    pass  # Optionally handle full queues
+    async def unregister(self, websocket, language: str = config.DEFAULT_LANGUAGE):
+        language, connection_id = self._connections.pop(websocket, (language, None))
+        if self._listeners.get(language, {}).pop(connection_id, None) is not None:
+            self._snapshots.pop(language, None)
+
+    def _snapshot(self, language: str) -> tuple:
+        snapshot = self._snapshots.get(language)
+        if snapshot is None:
+            snapshot = self._snapshots[language] = tuple(self._listeners.get(language, {}).values())
+        return snapshot
+
+    async def broadcast_audio(self, audio_bytes: bytes, language: str = config.DEFAULT_LANGUAGE, seq=None,
+                              seconds: float = 0.0):
+        """
+        Queue one encoded frame of sentence `seq` (`seconds` of audio) for every listener of the language.
+        """
+        history = self._history.get(language)
+        if history is None:
+            history = self._history[language] = AudioHistory()
+        history.append(audio_bytes, seq, seconds)
+        for queue in self._snapshot(language):
+            # Queue audio for each client listening in this language; the queue enforces its own limits
+            queue.put_nowait(audio_bytes, seq, seconds)
+
+    def listener_count(self, language: str) -> int:
+        return len(self._listeners.get(language, ()))
+
+    def history_stats(self) -> dict:
+        return {language: history.stats() for language, history in self._history.items()}
+
+    def stats(self) -> dict:
+        """
+        Per-language lag metrics for every connected listener.
+        """
+        return {
+            language: [dict(queue.stats(), id=connection_id) for connection_id, queue in listeners.items()]
+            for language, listeners in self._listeners.items()
+        }
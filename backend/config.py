@@ -0,0 +1,148 @@
+"""
+config.py
+Runtime tuning knobs for the translation pipeline, overridable through environment variables.
+"""
+
+import os
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+def _env_list(name: str, default: list) -> list:
+    value = os.getenv(name)
+    return [item.strip() for item in value.split(',') if item.strip()] if value else default
+
+
+# Threads per room for blocking calls besides TTS (Translator HTTP, speculation, encoding); each room's
+# executor adds one thread per TTS worker (languages x TTS_CONCURRENCY) on top
+EXECUTOR_MAX_WORKERS = _env_int('HSG_EXECUTOR_MAX_WORKERS', 4)
+
+# Concurrent workers per pipeline stage; sentences overlap across stages and are re-ordered before broadcast
+TRANSLATE_CONCURRENCY = _env_int('HSG_TRANSLATE_CONCURRENCY', 2)
+TTS_CONCURRENCY = _env_int('HSG_TTS_CONCURRENCY', 2)  # per target language
+
+# Target languages: one ASR stream fans out to a translation/TTS branch per language
+TARGET_LANGUAGES = _env_list('HSG_TARGET_LANGUAGES', ['hi', 'te', 'kn'])
+DEFAULT_LANGUAGE = TARGET_LANGUAGES[0]
+
+# Azure Neural TTS voice per target language (override with e.g. HSG_TTS_VOICE_TE)
+_DEFAULT_VOICES = {
+    'hi': 'hi-IN-MadhurNeural',
+    'te': 'te-IN-MohanNeural',
+    'kn': 'kn-IN-GaganNeural',
+}
+TTS_VOICES = {
+    lang: os.getenv(f'HSG_TTS_VOICE_{lang.upper()}', _DEFAULT_VOICES.get(lang))
+    for lang in TARGET_LANGUAGES
+}
+
+# Stream TTS audio to listeners chunk by chunk as it is synthesized, instead of per whole sentence
+TTS_STREAMING = os.getenv('HSG_TTS_STREAMING', '1') != '0'
+TTS_STREAM_CHUNK_BYTES = _env_int('HSG_TTS_STREAM_CHUNK_BYTES', 3200)  # 100 ms of 16 kHz 16-bit mono PCM
+
+# Per-listener queue bounds; a listener beyond either limit is handled by the overflow policy:
+# drop_oldest, drop_to_latest_sentence or disconnect (see broadcast_manager.py)
+LISTENER_QUEUE_POLICY = os.getenv('HSG_LISTENER_QUEUE_POLICY', 'drop_to_latest_sentence')
+LISTENER_QUEUE_MAX_BYTES = _env_int('HSG_LISTENER_QUEUE_MAX_BYTES', 320000)  # 10 s of 16 kHz 16-bit mono PCM
+LISTENER_MAX_LAG_SECONDS = _env_float('HSG_LISTENER_MAX_LAG_SECONDS', 15.0)
+
+# Listener audio codec, encoded once per language and shared by all listeners: pcm, opus or mp3
+OUTPUT_CODEC = os.getenv('HSG_OUTPUT_CODEC', 'pcm')
+OPUS_BITRATE = _env_int('HSG_OPUS_BITRATE', 24000)
+MP3_BITRATE_KBPS = _env_int('HSG_MP3_BITRATE_KBPS', 32)
+
+# HLS output (needs lameenc): fixed-duration MP3 segments per language in a rolling in-memory window
+HLS_ENABLED = os.getenv('HSG_HLS_ENABLED', '0') == '1'
+HLS_SEGMENT_SECONDS = _env_float('HSG_HLS_SEGMENT_SECONDS', 4.0)
+HLS_WINDOW_SEGMENTS = _env_int('HSG_HLS_WINDOW_SEGMENTS', 8)
+
+# Translation cache: LRU keyed by (source text, source lang, target lang, glossary version),
+# persisted to SQLite so the next service starts warm. Empty path keeps it in memory only.
+TRANSLATION_CACHE_PATH = os.getenv('HSG_TRANSLATION_CACHE_PATH', os.path.join('cache', 'translations.sqlite3'))
+TRANSLATION_CACHE_MAX_ENTRIES = _env_int('HSG_TRANSLATION_CACHE_MAX_ENTRIES', 20000)
+GLOSSARY_VERSION = os.getenv('HSG_GLOSSARY_VERSION', '1')  # bump when glossary/custom model changes
+
+# TTS audio cache keyed by (text, voice, output format): in-memory LRU over memory-mapped files
+TTS_CACHE_DIR = os.getenv('HSG_TTS_CACHE_DIR', os.path.join('cache', 'tts'))
+TTS_CACHE_MEMORY_BYTES = _env_int('HSG_TTS_CACHE_MEMORY_BYTES', 64 * 1024 * 1024)
+TTS_CACHE_DISK_BYTES = _env_int('HSG_TTS_CACHE_DISK_BYTES', 1024 * 1024 * 1024)
+
+# Translator HTTP clients: keep-alive pool size, timeouts (seconds) and HTTP/2 for the async client
+TRANSLATOR_POOL_SIZE = _env_int('HSG_TRANSLATOR_POOL_SIZE', 8)
+TRANSLATOR_CONNECT_TIMEOUT = _env_float('HSG_TRANSLATOR_CONNECT_TIMEOUT', 3.0)
+TRANSLATOR_READ_TIMEOUT = _env_float('HSG_TRANSLATOR_READ_TIMEOUT', 5.0)
+TRANSLATOR_HTTP2 = os.getenv('HSG_TRANSLATOR_HTTP2', '1') != '0'
+
+# Translator micro-batching: sentences arriving within the window share one request (0 disables)
+TRANSLATOR_BATCH_WINDOW_MS = _env_float('HSG_TRANSLATOR_BATCH_WINDOW_MS', 20.0)
+TRANSLATOR_BATCH_MAX_ITEMS = _env_int('HSG_TRANSLATOR_BATCH_MAX_ITEMS', 100)
+TRANSLATOR_BATCH_MAX_CHARS = _env_int('HSG_TRANSLATOR_BATCH_MAX_CHARS', 50000)
+
+# TTS synthesizer pool: pre-warmed synthesizers per language, health-checked in the background
+TTS_POOL_SIZE = _env_int('HSG_TTS_POOL_SIZE', 2)
+TTS_POOL_HEALTH_INTERVAL = _env_float('HSG_TTS_POOL_HEALTH_INTERVAL', 30.0)
+TTS_POOL_LEASE_TIMEOUT = _env_float('HSG_TTS_POOL_LEASE_TIMEOUT', 10.0)
+TTS_POOL_RETRY_MAX_SECONDS = _env_float('HSG_TTS_POOL_RETRY_MAX_SECONDS', 30.0)  # backoff cap when (re)creating fails
+
+# Opt-in low-latency mode: translate/synthesize stable clause prefixes of ASR partial results early
+SPECULATIVE_TRANSLATION = os.getenv('HSG_SPECULATIVE_TRANSLATION', '0') == '1'
+SPECULATION_STABLE_PARTIALS = _env_int('HSG_SPECULATION_STABLE_PARTIALS', 2)
+SPECULATION_MIN_WORDS = _env_int('HSG_SPECULATION_MIN_WORDS', 4)
+
+# Segmentation of recognized text: 'clause' also cuts long clauses, caps segment length and
+# releases a pending fragment after a max wait; 'sentence' cuts at sentence ends only
+SEGMENTER = os.getenv('HSG_SEGMENTER', 'clause')
+SEGMENT_CLAUSE_MIN_WORDS = _env_int('HSG_SEGMENT_CLAUSE_MIN_WORDS', 10)
+SEGMENT_MAX_WORDS = _env_int('HSG_SEGMENT_MAX_WORDS', 25)
+SEGMENT_MAX_WAIT_SECONDS = _env_float('HSG_SEGMENT_MAX_WAIT_SECONDS', 3.0)
+
+# Voice activity detection on /ws/audio-in: flush pending text on pauses, skip long silences
+VAD_ENABLED = os.getenv('HSG_VAD_ENABLED', '1') == '1'
+VAD_AGGRESSIVENESS = _env_int('HSG_VAD_AGGRESSIVENESS', 2)
+VAD_FRAME_MS = _env_int('HSG_VAD_FRAME_MS', 30)
+VAD_PAUSE_MS = _env_int('HSG_VAD_PAUSE_MS', 700)
+VAD_HANGOVER_MS = _env_int('HSG_VAD_HANGOVER_MS', 600)
+VAD_PREROLL_MS = _env_int('HSG_VAD_PREROLL_MS', 300)
+
+# Logging: records are enqueued on the hot path and written by a background thread
+LOG_LEVEL = os.getenv('HSG_LOG_LEVEL', 'INFO')
+LOG_FORMAT = os.getenv('HSG_LOG_FORMAT', 'json')  # json | text
+LOG_SAMPLE_EVERY = _env_int('HSG_LOG_SAMPLE_EVERY', 50)
+
+# Rooms: independent sessions (own buffer, listeners) sharing the service clients and caches
+MAX_ROOMS = _env_int('HSG_MAX_ROOMS', 16)
+ROOM_IDLE_SECONDS = _env_float('HSG_ROOM_IDLE_SECONDS', 300.0)
+
+# Handoff of recognition events from Speech SDK threads to the event loop
+RECOGNITION_QUEUE_SIZE = _env_int('HSG_RECOGNITION_QUEUE_SIZE', 64)
+RECOGNITION_HANDOFF_TIMEOUT = _env_float('HSG_RECOGNITION_HANDOFF_TIMEOUT', 5.0)
+
+# Late joiners: per-language history of broadcast audio, replayed from memory on request
+LATE_JOIN_START = os.getenv('HSG_LATE_JOIN_START', 'sentence')  # live | sentence | rewind
+LATE_JOIN_HISTORY_SECONDS = _env_float('HSG_LATE_JOIN_HISTORY_SECONDS', 30.0)
+LATE_JOIN_HISTORY_MAX_BYTES = _env_int('HSG_LATE_JOIN_HISTORY_MAX_BYTES', 2 * 1024 * 1024)
+LATE_JOIN_MAX_AGE_SECONDS = _env_float('HSG_LATE_JOIN_MAX_AGE_SECONDS', 30.0)  # older sentences are not replayed
+
+# Paced delivery on /ws/audio-out: small packets with a timing header, sent at real-time rate
+PACER_PACKET_MS = _env_int('HSG_PACER_PACKET_MS', 20)
+PACER_LEAD_MS = _env_int('HSG_PACER_LEAD_MS', 200)
+
+# Subtitle channel (/ws/text-out): sentences sent to new subscribers, WebVTT archive directory (empty: memory only)
+SUBTITLE_HISTORY = _env_int('HSG_SUBTITLE_HISTORY', 5)
+SUBTITLE_ARCHIVE_DIR = os.getenv('HSG_SUBTITLE_ARCHIVE_DIR', 'archive/subtitles')
+
+# Latency budget: output lag (recognition to playout) at which TTS speeds up, merges and drops sentences
+LATENCY_CONTROL = os.getenv('HSG_LATENCY_CONTROL', '1') == '1'
+LATENCY_SPEEDUP_SECONDS = _env_float('HSG_LATENCY_SPEEDUP_SECONDS', 1.5)
+LATENCY_MERGE_SECONDS = _env_float('HSG_LATENCY_MERGE_SECONDS', 3.0)
+LATENCY_DROP_SECONDS = _env_float('HSG_LATENCY_DROP_SECONDS', 6.0)
+LATENCY_MAX_RATE = _env_float('HSG_LATENCY_MAX_RATE', 1.3)
+LATENCY_MERGE_MAX_WORDS = _env_int('HSG_LATENCY_MERGE_MAX_WORDS', 20)
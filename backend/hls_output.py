@@ -0,0 +1,159 @@
+"""
+hls_output.py
+HLS output path: cuts each language's TTS audio into fixed-duration MP3 segments held in a rolling
+in-memory window, served as live playlists and segments over HTTP.
+"""
+
+import asyncio
+import collections
+import math
+import struct
+import time
+from typing import Dict, List, Optional
+from async_executor import BlockingCallExecutor
+from audio_encoder import Mp3Encoder, BYTES_PER_SECOND
+import config
+from log import get_logger
+
+logger = get_logger(__name__)
+
+# Packed-audio HLS segments carry their start time in this ID3 PRIV frame (RFC 8216 §3.4)
+_TIMESTAMP_OWNER = b"com.apple.streaming.transportStreamTimestamp\0"
+
+
+def _syncsafe(n: int) -> bytes:
+    return bytes([(n >> 21) & 0x7F, (n >> 14) & 0x7F, (n >> 7) & 0x7F, n & 0x7F])
+
+
+def _id3_timestamp(seconds: float) -> bytes:
+    """
+    ID3v2.4 tag with the segment's start time as a 33-bit, 90 kHz MPEG-2 timestamp.
+    """
+    payload = _TIMESTAMP_OWNER + struct.pack(">Q", int(seconds * 90000) & ((1 << 33) - 1))
+    frame = b"PRIV" + _syncsafe(len(payload)) + b"\0\0" + payload
+    return b"ID3\x04\0\0" + _syncsafe(len(frame)) + frame
+
+
+class HLSSegmenter:
+    """
+    Segments one language's PCM stream. Media time only advances with audio written, so the
+    owner pads silence (see HLSOutput) to keep the live edge moving between sentences.
+    """
+    def __init__(self, language: str, segment_seconds: float, window_segments: int):
+        self.language = language
+        self.segment_seconds = segment_seconds
+        self._segment_bytes = int(segment_seconds * BYTES_PER_SECOND) & ~1
+        self._encoder = Mp3Encoder()
+        self.segments = collections.deque(maxlen=window_segments)  # (sequence number, duration, data)
+        self.media_seconds = 0.0
+        self._next_number = 0
+        self._segment_start = 0.0
+        self._pcm_bytes = 0
+        self._current = bytearray(_id3_timestamp(0.0))
+
+    def write(self, pcm: bytes):
+        """
+        Append PCM, cutting a segment each time `segment_seconds` of audio has been written.
+        """
+        view = memoryview(pcm)
+        while view:
+            take = min(len(view), self._segment_bytes - self._pcm_bytes)
+            for frame in self._encoder.encode(view[:take]):
+                self._current += frame
+            self._pcm_bytes += take
+            self.media_seconds += take / BYTES_PER_SECOND
+            view = view[take:]
+            if self._pcm_bytes >= self._segment_bytes:
+                self._cut()
+
+    def end_sentence(self):
+        """
+        Flush the encoder's held-back samples into the current segment at a sentence boundary.
+        """
+        for frame in self._encoder.flush():
+            self._current += frame
+
+    def _cut(self):
+        duration = self._pcm_bytes / BYTES_PER_SECOND
+        self.segments.append((self._next_number, duration, bytes(self._current)))
+        self._next_number += 1
+        self._segment_start += duration
+        self._pcm_bytes = 0
+        self._current = bytearray(_id3_timestamp(self._segment_start))
+
+    def playlist(self) -> str:
+        """
+        Live media playlist over the rolling segment window.
+        """
+        segments = list(self.segments)
+        target = math.ceil(max((d for _, d, _ in segments), default=self.segment_seconds))
+        lines = [
+            "#EXTM3U",
+            "#EXT-X-VERSION:3",
+            f"#EXT-X-TARGETDURATION:{target}",
+            f"#EXT-X-MEDIA-SEQUENCE:{segments[0][0] if segments else 0}",
+        ]
+        for number, duration, _ in segments:
+            lines.append(f"#EXTINF:{duration:.3f},")
+            lines.append(f"segment_{number}.mp3")
+        return "\n".join(lines) + "\n"
+
+    def segment(self, number: int) -> Optional[bytes]:
+        for n, _, data in self.segments:
+            if n == number:
+                return data
+        return None
+
+
+class HLSOutput:
+    """
+    One HLSSegmenter per target language, plus a background task that pads silence whenever a
+    language's media timeline falls a segment behind the wall clock (i.e. between sentences),
+    so players keep a steadily advancing live edge. Memory is bounded by the segment window.
+    MP3 encoding runs on a single worker thread rather than the event loop; one thread keeps each
+    segmenter's writes, sentence ends and padding in the order they were issued.
+    """
+    def __init__(self, languages: List[str], segment_seconds: float = config.HLS_SEGMENT_SECONDS,
+                 window_segments: int = config.HLS_WINDOW_SEGMENTS):
+        self.segment_seconds = segment_seconds
+        self.segmenters: Dict[str, HLSSegmenter] = {
+            lang: HLSSegmenter(lang, segment_seconds, window_segments) for lang in languages
+        }
+        self._encoding = BlockingCallExecutor(1)
+        self._started_at = None
+        self._task = None
+        logger.info("Initialized %ss segments, window %s, languages %s", segment_seconds, window_segments, list(languages))
+
+    def start(self):
+        """
+        Start the live timeline and the silence-padding task (call from the running event loop).
+        """
+        self._started_at = time.monotonic()
+        self._task = asyncio.create_task(self._pad_silence())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        self._encoding.shutdown(wait=False)
+
+    async def write(self, language: str, pcm: bytes):
+        await self._encoding.run(self.segmenters[language].write, pcm)
+
+    async def end_sentence(self, language: str):
+        await self._encoding.run(self.segmenters[language].end_sentence)
+
+    @staticmethod
+    def _pad(segmenter: HLSSegmenter, seconds: float):
+        segmenter.end_sentence()
+        segmenter.write(bytes(int(seconds * BYTES_PER_SECOND) & ~1))
+
+    async def _pad_silence(self):
+        while True:
+            await asyncio.sleep(self.segment_seconds / 2)
+            live = time.monotonic() - self._started_at
+            for segmenter in self.segmenters.values():
+                behind = live - segmenter.media_seconds
+                if behind > self.segment_seconds:
+                    await self._encoding.run(self._pad, segmenter, behind)
@@ -0,0 +1,95 @@
+"""
+latency_controller.py
+Keeps listener delay inside the latency budget when the speaker outpaces synthesis: as a language's
+output lag grows it speeds up speech, then merges short queued sentences, then drops stale ones.
+"""
+
+import collections
+import time
+from typing import Callable, List, Optional
+import config
+from log import get_logger
+
+logger = get_logger(__name__)
+
+RATE_STEP = 0.05  # speaking rates are quantized so SSML and TTS cache keys repeat
+
+
+class LatencyController:
+    """
+    Catch-up policy per target language. `measure(language, seq)` returns the output lag of a
+    sentence about to be synthesized: seconds between its recognition and the moment its audio
+    will start playing, behind the audio already queued for listeners.
+    Below `speedup_at` speech is synthesized at normal rate; between `speedup_at` and `merge_at`
+    the rate rises linearly to `max_rate`; from `merge_at` short consecutive sentences waiting for
+    TTS are synthesized as one (fewer requests and sentence-boundary pauses); a sentence whose lag
+    exceeds `drop_at` is not voiced at all (its subtitle is still published).
+    """
+    def __init__(self, languages, measure: Callable[[str, int], float],
+                 speedup_at: float = config.LATENCY_SPEEDUP_SECONDS, merge_at: float = config.LATENCY_MERGE_SECONDS,
+                 drop_at: float = config.LATENCY_DROP_SECONDS, max_rate: float = config.LATENCY_MAX_RATE,
+                 merge_max_words: int = config.LATENCY_MERGE_MAX_WORDS):
+        self.languages = list(languages)
+        self.measure = measure
+        self.speedup_at = speedup_at
+        self.merge_at = max(merge_at, speedup_at)
+        self.drop_at = max(drop_at, self.merge_at)
+        self.max_rate = max(max_rate, 1.0)
+        self.merge_max_words = merge_max_words
+        self.lag = dict.fromkeys(self.languages, 0.0)
+        self.rate = dict.fromkeys(self.languages, 1.0)
+        self.counts = {"sped_up": 0, "merged": 0, "dropped": 0}
+        self.decisions = collections.deque(maxlen=50)
+
+    def _rate_for(self, lag: float) -> float:
+        if lag <= self.speedup_at:
+            return 1.0
+        fraction = min(1.0, (lag - self.speedup_at) / max(self.merge_at - self.speedup_at, 1e-6))
+        return round(1.0 + round(fraction * (self.max_rate - 1.0) / RATE_STEP) * RATE_STEP, 2)
+
+    def _record(self, language: str, seqs: List[int], action: str, lag: float, rate: Optional[float]):
+        self.decisions.append({"time": time.time(), "language": language, "seqs": list(seqs), "action": action,
+                               "lag_seconds": round(lag, 3), "rate": rate})
+
+    def decide(self, language: str, seqs: List[int]) -> Optional[float]:
+        """
+        Speaking rate for the sentence(s) `seqs` (one TTS job, `seqs[0]` first), or None to drop them.
+        """
+        lag = self.measure(language, seqs[0])
+        self.lag[language] = lag
+        if lag > self.drop_at:
+            self.counts["dropped"] += len(seqs)
+            self._record(language, seqs, "drop", lag, None)
+            logger.warning("%s output %.1fs behind: dropping #%s", language, lag, list(seqs),
+                           extra={"seq": seqs[0], "language": language})
+            return None
+        rate = self._rate_for(lag)
+        if rate != self.rate[language]:
+            logger.info("%s output %.1fs behind: speaking rate %.2f -> %.2f", language, lag, self.rate[language], rate,
+                        extra={"seq": seqs[0], "language": language})
+            self._record(language, seqs, "rate", lag, rate)
+            self.rate[language] = rate
+        if rate > 1.0:
+            self.counts["sped_up"] += len(seqs)
+        return rate
+
+    def should_merge(self, language: str, queued_text: str, text: str) -> bool:
+        """
+        Whether `text` may join the sentence(s) `queued_text` still waiting for TTS.
+        """
+        return (self.lag[language] >= self.merge_at
+                and len(queued_text.split()) + len(text.split()) <= self.merge_max_words)
+
+    def merged(self, language: str, seqs: List[int]):
+        self.counts["merged"] += 1
+        self._record(language, seqs, "merge", self.lag[language], self.rate[language])
+        logger.info("%s output %.1fs behind: merged #%s into one TTS request", language, self.lag[language], list(seqs),
+                    extra={"seq": seqs[0], "language": language})
+
+    def stats(self) -> dict:
+        return {
+            "lag_seconds": {lang: round(lag, 3) for lang, lag in self.lag.items()},
+            "rate": dict(self.rate),
+            **self.counts,
+            "recent": list(self.decisions)[-10:],
+        }
@@ -0,0 +1,107 @@
+"""
+log.py
+Queue-backed logging: the calling thread (often the event loop) only enqueues the record;
+a background QueueListener thread formats it (JSON or text) and writes it out.
+"""
+
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+import config
+
+ROOT_LOGGER = "hsg"
+
+# Attributes every LogRecord has; anything else was passed through `extra=` and goes into the JSON
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "sampled"}
+
+_listener = None
+
+
+def get_logger(name: str) -> logging.Logger:
+    """
+    Logger for a backend module, e.g. get_logger(__name__) -> "hsg.pipeline".
+    """
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+class EnqueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that enqueues the record untouched: message formatting (and its %-args)
+    happens on the listener thread instead of the caller's.
+    """
+    def prepare(self, record):
+        return record
+
+
+class SampleFilter(logging.Filter):
+    """
+    Passes 1 in `every` records logged with extra={"sampled": True} (per-chunk events),
+    counted per call site; other records always pass.
+    """
+    def __init__(self, every: int = config.LOG_SAMPLE_EVERY):
+        super().__init__()
+        self.every = max(every, 1)
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if not getattr(record, "sampled", False) or self.every == 1:
+            return True
+        key = (record.pathname, record.lineno)
+        with self._lock:
+            count = self._counts.get(key, 0)
+            self._counts[key] = count + 1
+        return count % self.every == 0
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line: ts, level, logger, msg, extra fields and exception text.
+    """
+    def format(self, record):
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        entry.update({key: value for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES})
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+def setup_logging(level: str = config.LOG_LEVEL, fmt: str = config.LOG_FORMAT, sample_every: int = config.LOG_SAMPLE_EVERY):
+    """
+    Route the backend's loggers through a queue to a stdout writer thread. Idempotent.
+    """
+    global _listener
+    if _listener:
+        return
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(JsonFormatter() if fmt == "json" else
+                        logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    log_queue = queue.SimpleQueue()
+    handler = EnqueueHandler(log_queue)
+    # Sampling runs before the enqueue, so dropped per-chunk records cost no queue traffic
+    handler.addFilter(SampleFilter(sample_every))
+    logger = logging.getLogger(ROOT_LOGGER)
+    logger.setLevel(level.upper())
+    logger.addHandler(handler)
+    logger.propagate = False
+    _listener = logging.handlers.QueueListener(log_queue, output)
+    _listener.start()
+
+
+def stop_logging():
+    """
+    Flush queued records and stop the writer thread.
+    """
+    global _listener
+    if _listener:
+        _listener.stop()
+        _listener = None
@@ -1,122 +1,224 @@
 import asyncio
+import time
 from translation_service import AzureTranslatorService
 from tts_service import AzureTTSService
-import re
+from async_executor import BlockingCallExecutor
+from pipeline import SentencePipeline
+from audio_encoder import create_encoder, BYTES_PER_SECOND
+from speculation import Speculator
+from segmenter import create_segmenter
+from tracing import LatencyTracker
+from subtitles import SubtitleChannel
+from latency_controller import LatencyController
+import config
+from log import get_logger
+
+logger = get_logger(__name__)
 
 class Orchestrator:
     """
     Controls the pipeline: receives audio, runs ASR → translation → TTS,
-    and broadcasts TTS audio to all connected clients via the broadcast manager.
+    and broadcasts TTS audio to the listeners of each target language via the broadcast manager.
+    Completed sentences are handed to a staged SentencePipeline so translation and TTS
+    of consecutive sentences overlap, while audio is still delivered in spoken order.
+    Audio is encoded once per language before fan-out; all listeners share the encoded frames.
+    In low-latency mode, partial ASR hypotheses start speculative translation/TTS of stable clauses.
+    Recognized text is cut into segments by a pluggable incremental segmenter; a timer task
+    releases fragments that wait too long for a boundary.
+    Every segment is traced from audio ingest to delivery in `tracker` (a LatencyTracker).
+    Translated sentences and their playout times are published on `subtitles` (a SubtitleChannel).
+    With latency control, a LatencyController watches how far each language's output lags behind
+    recognition and speeds up, merges or drops sentences to stay inside the latency budget.
     """
-    def __init__(self, asr_service, translator_service, tts_service, broadcast_manager):
+    def __init__(self, asr_service, translator_service, tts_service, broadcast_manager, executor=None, languages=None,
+                 hls_output=None, speculative: bool = config.SPECULATIVE_TRANSLATION, segmenter=None,
+                 tracker=None, subtitles=None, latency_control: bool = config.LATENCY_CONTROL):
         self.asr = asr_service
         self.translator = translator_service
         self.tts = tts_service
         self.broadcast = broadcast_manager
-        self.buffer = ""
-
-    async def process(self, audio_chunk: bytes):
-        print(f"[Orchestrator] Processing audio chunk of size {len(audio_chunk)} bytes")
-
-        async def asr_callback(text):
-            print(f"[Orchestrator] ASR recognized: '{text}'")
-            if not text:
-                print("[Orchestrator] No text recognized from ASR.")
-                return
-
-            # 2. Buffer & sentence segmentation
-            self.buffer += (" " if self.buffer else "") + text
-            sentences = re.split(r'(?<=[.!?]) +', self.buffer)
-            complete = [s for s in sentences if re.search(r'[.!?]$', s.strip())]
-            last = sentences[-1] if sentences else ""
-
-            for sent in complete:
-                sent = sent.strip()
-                if not sent:
-                    continue
-
-                # 3. Translate
-                try:
-                    translated = self.translator.translate_text(sent)
-                    print(f"[Orchestrator] Translated: '{translated}'")
-                except Exception as e:
-                    print(f"[Orchestrator] Translation error: {e}")
-                    continue
-
-                # 4. TTS
-                try:
-                    audio_data = self.tts.text_to_speech(translated)
-                    print(f"[Orchestrator] TTS audio data size: {len(audio_data) if audio_data else 0} bytes")
-                except Exception as e:
-                    print(f"[Orchestrator] TTS error: {e}")
-                    continue
-
-                if audio_data:
-                    # 5. Broadcast to all connected clients
-                    asyncio.create_task(self.broadcast.broadcast_audio(audio_data))
-                else:
-                    print(f"[Orchestrator] No audio generated for: '{sent}'")
-
-            # 6. Retain only the incomplete sentence fragment
-            self.buffer = last if not re.search(r'[.!?]$', last.strip()) else ""
-
-    async def process_text(self, text: str):
-        print(f"[Orchestrator] ASR recognized: '{text}'")
+        self.hls = hls_output
+        self.languages = list(languages or config.TARGET_LANGUAGES)
+        self.encoders = {lang: create_encoder(config.OUTPUT_CODEC) for lang in self.languages}
+        # Translator and TTS clients block, so they run on a bounded pool off the event loop. Without a
+        # shared executor, each orchestrator (room) has its own: a thread per TTS worker plus headroom,
+        # so one busy room cannot starve another's calls
+        self._owns_executor = executor is None
+        self.executor = executor or BlockingCallExecutor(
+            len(self.languages) * config.TTS_CONCURRENCY + config.EXECUTOR_MAX_WORKERS)
+        self.tracker = tracker or LatencyTracker()
+        self.subtitles = subtitles or SubtitleChannel(self.languages)
+        self._playout_end = dict.fromkeys(self.languages, 0.0)  # when each language's queued audio runs out
+        self._cues = {}  # (seq, language) -> [start, seconds] of the sentence being delivered
+        self._absorbed = {}  # (seq, language) -> later sentences merged into seq's TTS job
+        self.controller = LatencyController(self.languages, self._output_lag) if latency_control else None
+        self.pipeline = SentencePipeline(
+            translator=self.translator,
+            tts=self.tts,
+            executor=self.executor,
+            on_audio=self._deliver,
+            on_sentence_end=self._end_sentence,
+            languages=self.languages,
+            translate_concurrency=config.TRANSLATE_CONCURRENCY,
+            tts_concurrency=config.TTS_CONCURRENCY,
+            tracker=self.tracker,
+            on_translated=self.subtitles.sentence,
+            controller=self.controller,
+            on_merged=self._merged,
+        )
+        self.speculator = Speculator(self.translator, self.tts, self.executor, self.languages) if speculative else None
+        self.segmenter = segmenter or create_segmenter()
+        self._timer_task = None
+        self._flush_next = False
+        self._utterance_started_at = None  # first speech audio of the utterance being recognized
+
+    @property
+    def buffer(self) -> str:
+        # Recognized text not yet handed to the pipeline
+        return self.segmenter.pending
+
+    async def _deliver(self, language: str, seq: int, audio_data: bytes):
+        # 5. Encode once, then broadcast the same frames to the language's listeners, in sentence order.
+        # The sequencer awaits one delivery per language at a time, so each encoder is used serially
+        encoder = self.encoders[language]
+        frames = await self.executor.run(encoder.encode, audio_data)
+        self._schedule(language, seq, len(audio_data) / BYTES_PER_SECOND)
+        for frame in frames:
+            await self.broadcast.broadcast_audio(frame, language, seq, encoder.frame_seconds(frame))
+        for voiced in (seq, *self._absorbed.get((seq, language), ())):
+            self.tracker.mark(voiced, 'first_byte_enqueued', language)
+        if self.hls:
+            await self.hls.write(language, audio_data)
+
+    def _output_lag(self, language: str, seq: int) -> float:
+        # Seconds from recognizing sentence `seq` until its audio would start playing for listeners
+        trace = self.tracker.trace(seq)
+        spoken = trace and (trace.get('recognized') or trace.get('segmented'))
+        if not spoken:
+            return 0.0
+        return max(time.monotonic(), self._playout_end[language]) - spoken
+
+    def _schedule(self, language: str, seq: int, seconds: float):
+        # Listeners play a language's audio back to back at real-time rate: a sentence starts when
+        # the audio queued before it runs out, or now if the channel was idle
+        cue = self._cues.get((seq, language))
+        if cue is None:
+            start = max(time.monotonic(), self._playout_end[language])
+            cue = self._cues[(seq, language)] = [start, 0.0]
+        cue[1] += seconds
+        self._playout_end[language] = cue[0] + cue[1]
+
+    def _merged(self, language: str, seqs):
+        # Later sentences voiced by seqs[0]'s audio share its cue and trace marks
+        self._absorbed[(seqs[0], language)] = seqs[1:]
+        self.subtitles.merge(language, seqs)
+
+    async def _end_sentence(self, language: str, seq: int):
+        # Emit whatever the encoder still holds so a sentence's tail is not held until the next one
+        encoder = self.encoders[language]
+        for frame in await self.executor.run(encoder.flush):
+            await self.broadcast.broadcast_audio(frame, language, seq, encoder.frame_seconds(frame))
+        if self.hls:
+            await self.hls.end_sentence(language)
+        self._absorbed.pop((seq, language), None)
+        start, seconds = self._cues.pop((seq, language), None) or (
+            max(time.monotonic(), self._playout_end[language]), 0.0)
+        self.subtitles.timing(language, seq, start, seconds)
+
+    def audio_received(self):
+        """
+        Note incoming speech audio; the first after a recognition starts the next utterance's trace.
+        """
+        if self._utterance_started_at is None:
+            self._utterance_started_at = time.monotonic()
+
+    def _submit(self, text: str, speculative=None, recognition=(None, None)) -> int:
+        # `recognition` is (audio received, recognized) of the final a segment was cut from; fragments
+        # released later by the timer, a pause or the end of the session are traced from 'segmented' on
+        seq = self.pipeline.submit(text, speculative=speculative)
+        audio_received, recognized = recognition
+        self.tracker.begin(seq, text, audio_received=audio_received, recognized=recognized)
+        return seq
+
+    def process_partial(self, text: str):
+        """
+        Feed a partial ASR hypothesis to the speculator (low-latency mode only).
+        """
+        if self.speculator:
+            self.speculator.observe(self.buffer, text)
+
+    async def process_text(self, text: str, recognized_at: float = None):
+        logger.info("ASR recognized: '%s'", text)
         if not text:
-            print("[Orchestrator] No text recognized from ASR.")
+            logger.debug("No text recognized from ASR.")
             return
+        recognition = (self._utterance_started_at, recognized_at or time.monotonic())
+        self._utterance_started_at = None
+
+        # Clauses already speculated on from partials go first, reusing their results
+        if self.speculator:
+            confirmed, text = self.speculator.reconcile(f"{self.buffer} {text}".strip())
+            self.segmenter.reset()
+            for clause, task in confirmed:
+                self._submit(clause, speculative=task, recognition=recognition)
+
+        # 2. Incremental segmentation; the unfinished fragment stays in the segmenter
+        # 3-4. Translate and synthesize completed segments in the staged pipeline
+        for segment in self.segmenter.feed(text):
+            self._submit(segment, recognition=recognition)
+        # The recognition that closes an utterance arrives after its pause was detected
+        if self._flush_next:
+            self._flush_next = False
+            self._release_pending(recognition)
+
+        if self._timer_task is None and getattr(self.segmenter, 'max_wait', None):
+            self._timer_task = asyncio.create_task(self._release_stale_fragments())
+
+    def end_of_speech(self):
+        """
+        The speaker paused (voice activity detection): release the pending fragment now instead of
+        waiting for a sentence end or the end of the session. Unlike flush(), does not wait for the pipeline.
+        """
+        self._release_pending()
+        # Only when speech since the last recognition still awaits its final; otherwise the flag would
+        # cut the first fragment of the next utterance mid-sentence
+        self._flush_next = self._utterance_started_at is not None
+
+    def _release_pending(self, recognition=(None, None)):
+        fragment = self.segmenter.flush()
+        if fragment:
+            logger.info("Pause detected, releasing: '%s'", fragment)
+            self._submit(fragment, recognition=recognition)
+
+    async def _release_stale_fragments(self):
+        # Long pauses mid-sentence would otherwise hold the fragment until the next recognition
+        interval = min(0.25, self.segmenter.max_wait / 4)
+        while True:
+            await asyncio.sleep(interval)
+            fragment = self.segmenter.poll()
+            if fragment:
+                logger.info("Max wait reached, releasing: '%s'", fragment)
+                self._submit(fragment)
+
+    async def flush(self):
+        """
+        Processes any leftover buffered text at end of stream/session and waits for the pipeline to drain.
+        """
+        remaining = self.segmenter.flush()
+        logger.info("Flushing buffer: '%s'", remaining or '')
+        if remaining:
+            self._submit(remaining)
+        await self.pipeline.drain()
 
-        # 2. Buffer & sentence segmentation
-        self.buffer += (" " if self.buffer else "") + text
-        sentences = re.split(r'(?<=[.!?]) +', self.buffer)
-        complete = [s for s in sentences if re.search(r'[.!?]$', s.strip())]
-        last = sentences[-1] if sentences else ""
-
-        for sent in complete:
-            sent = sent.strip()
-            if not sent:
-                continue
-
-            # 3. Translate
-            try:
-                translated = self.translator.translate_text(sent)
-                print(f"[Orchestrator] Translated: '{translated}'")
-            except Exception as e:
-                print(f"[Orchestrator] Translation error: {e}")
-                continue
-
-            # 4. TTS
-            try:
-                audio_data = self.tts.text_to_speech(translated)
-                print(f"[Orchestrator] TTS audio data size: {len(audio_data) if audio_data else 0} bytes")
-            except Exception as e:
-                print(f"[Orchestrator] TTS error: {e}")
-                continue
-
-            if audio_data:
-                # 5. Broadcast to all connected clients
-                asyncio.create_task(self.broadcast.broadcast_audio(audio_data))
-            else:
-                print(f"[Orchestrator] No audio generated for: '{sent}'")
-
-        # 6. Retain only the incomplete sentence fragment
-        self.buffer = last if not re.search(r'[.!?]$', last.strip()) else ""
-
-    def flush(self):
+    async def close(self):
         """
-        Processes any leftover buffered text at end of stream/session.
+        Stop the segmenter timer and the pipeline workers, and the executor if it is this orchestrator's own.
         """
-        remaining = self.buffer.strip()
-        print(f"[Orchestrator] Flushing buffer: '{remaining}'")
-        if not remaining:
-            return
-        try:
-            translated = self.translator.translate_text(remaining)
-            print(f"[Orchestrator] Flushed translation: '{translated}'")
-            audio_data = self.tts.text_to_speech(translated)
-            print(f"[Orchestrator] Flushed TTS audio data size: {len(audio_data) if audio_data else 0} bytes")
-            if audio_data:
-                asyncio.create_task(self.broadcast.broadcast_audio(audio_data))
-        except Exception as e:
-            print(f"[Orchestrator] Flush error: {e}")
-        self.buffer = ""
+        if self._timer_task:
+            self._timer_task.cancel()
+            self._timer_task = None
+        await self.pipeline.close()
+        self.subtitles.close()
+        await asyncio.to_thread(self.subtitles.close_archives)
+        if self._owns_executor:
+            self.executor.shutdown(wait=False)
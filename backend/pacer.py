@@ -0,0 +1,65 @@
+"""
+pacer.py
+Real-time paced delivery for /ws/audio-out: audio leaves the server in small packets at playback
+rate, each with a header carrying sequence numbers and timestamps, so clients need only a small
+jitter buffer and can measure drift and latency.
+"""
+
+import asyncio
+import struct
+import time
+from typing import Iterator, Tuple
+from audio_encoder import BYTES_PER_SECOND
+import config
+
+# Packet header (network byte order, 24 bytes) followed by the audio payload:
+#   uint32  packet number (per listener, wraps)
+#   int32   sentence sequence number (-1 if unknown)
+#   uint64  media timestamp: microseconds of audio sent to this listener before this packet
+#   float64 server wall-clock send time (Unix seconds)
+HEADER = struct.Struct("!IiQd")
+
+
+class Pacer:
+    """
+    Sends one listener's audio at real-time rate. PCM is re-framed into `packet_ms` packets
+    (the last packet of a chunk may be shorter); compressed codecs are paced per encoded frame.
+    Packets are released up to `lead_ms` ahead of their playback time; after the queue ran dry
+    the clock restarts at the live edge instead of bursting to catch up.
+    """
+    def __init__(self, pcm: bool, packet_ms: int = config.PACER_PACKET_MS, lead_ms: int = config.PACER_LEAD_MS,
+                 bytes_per_second: int = BYTES_PER_SECOND):
+        if not 20 <= packet_ms <= 60:
+            raise ValueError("Pacer packets must be 20-60 ms")
+        self.packet_bytes = (bytes_per_second * packet_ms // 1000) & ~1 if pcm else 0
+        self.bytes_per_second = bytes_per_second
+        self.lead = lead_ms / 1000
+        self.packet_number = 0
+        self.media_us = 0
+        self._deadline = None  # monotonic playback time of the next packet
+
+    def _packets(self, audio: bytes, seconds: float) -> Iterator[Tuple[bytes, float]]:
+        if not self.packet_bytes:
+            yield audio, seconds
+            return
+        view = memoryview(audio)
+        for start in range(0, len(audio), self.packet_bytes):
+            payload = view[start:start + self.packet_bytes]
+            yield payload, len(payload) / self.bytes_per_second
+
+    async def send(self, websocket, audio: bytes, seq, seconds: float):
+        """
+        Send one queued chunk (`seconds` of audio of sentence `seq`) as paced packets.
+        """
+        for payload, duration in self._packets(audio, seconds):
+            now = time.monotonic()
+            if self._deadline is None or self._deadline < now:
+                self._deadline = now
+            delay = self._deadline - self.lead - now
+            if delay > 0:
+                await asyncio.sleep(delay)
+            header = HEADER.pack(self.packet_number & 0xFFFFFFFF, -1 if seq is None else seq, self.media_us, time.time())
+            await websocket.send_bytes(header + payload)
+            self.packet_number += 1
+            self.media_us += int(duration * 1_000_000)
+            self._deadline += duration
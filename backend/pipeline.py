@@ -0,0 +1,319 @@
+"""
+pipeline.py
+Staged sentence pipeline: translate queue → per-language TTS queues → per-language sequencers,
+with per-stage concurrency.
+"""
+
+import asyncio
+import contextlib
+import functools
+import config
+from translation_service import TranslationBatcher
+from log import get_logger
+
+logger = get_logger(__name__)
+
+
+def lease_synthesizer(tts, text: str, language: str, rate: float = 1.0):
+    """
+    Async context manager yielding the synthesizer to pass to `tts` as `pooled` (None if not needed).
+    Waiting for a free synthesizer happens on the event loop, before any executor thread is taken.
+    """
+    lease_async = getattr(tts, 'lease_async', None)
+    return lease_async(text, language, rate) if lease_async else contextlib.nullcontext()
+
+
+class Sequencer:
+    """
+    Reorder buffer keyed by sentence sequence number. Stages finish out of order when they run
+    concurrently; the sequencer releases audio strictly in the order the sentences were spoken.
+    Chunks of the sentence currently at the head are released as soon as they arrive (streaming),
+    while chunks of later sentences are held until every earlier sentence has completed.
+    """
+    def __init__(self, on_release, on_complete=None):
+        """
+        `on_release(seq, chunk)` is awaited for each audio chunk, in sequence order, and
+        `on_complete(seq)` (optional) once all of a sentence's audio has been released.
+        """
+        self.next_seq = 0
+        self._held = {}  # seq -> audio chunks waiting for an earlier sentence
+        self._done = set()  # completed sentences not yet at the head
+        self._on_release = on_release
+        self._on_complete = on_complete
+        self._lock = asyncio.Lock()
+
+    async def push(self, seq: int, chunk: bytes):
+        """
+        Add an audio chunk for `seq`; released immediately if `seq` is at the head.
+        """
+        async with self._lock:
+            if seq == self.next_seq:
+                await self._on_release(seq, chunk)
+            else:
+                self._held.setdefault(seq, []).append(chunk)
+
+    async def complete(self, seq: int, audio: bytes = b""):
+        """
+        Mark `seq` finished (optionally with its whole audio) and release every sentence now in order.
+        A failed sentence must still be completed (with empty audio) so later ones are not held back.
+        """
+        if audio:
+            await self.push(seq, audio)
+        async with self._lock:
+            self._done.add(seq)
+            while self.next_seq in self._done:
+                self._done.discard(self.next_seq)
+                if self._on_complete:
+                    await self._on_complete(self.next_seq)
+                self.next_seq += 1
+                for chunk in self._held.pop(self.next_seq, ()):
+                    await self._on_release(self.next_seq, chunk)
+
+    @property
+    def waiting(self) -> int:
+        """
+        Number of later sentences holding audio behind the one currently at the head.
+        """
+        return len(self._held)
+
+
+class TTSJob:
+    """
+    Text waiting for one language's TTS: a sentence, or consecutive sentences merged to catch up.
+    """
+    def __init__(self, seq: int, text: str):
+        self.seqs = [seq]
+        self.text = text
+        self.started = False
+
+
+class SentencePipeline:
+    """
+    Runs completed sentences through translation and TTS as overlapping stages, so sentence N+1
+    can be translated while sentence N is still being synthesized. One Translator call covers
+    every target language; each language then has its own TTS queue and Sequencer, so a slow
+    voice never holds back the others. Translation uses the translator's native async client when
+    it has one; blocking service calls go through the shared executor;
+    audio reaches `on_audio(language, seq, audio)` in sentence order per language, followed by
+    `on_sentence_end(language, seq)` when given. `on_translated(seq, text, translations)`, when given,
+    is called as soon as a sentence is translated, before its TTS.
+    A `controller` (LatencyController, optional) sets each TTS job's speaking rate, may merge short
+    sentences waiting for the same language, and may drop sentences that are already too late;
+    `on_merged(language, seqs)` is called with a job's sequence numbers whenever one is merged into it.
+    Speculative audio goes through the controller too: it is dropped with its sentence, and
+    re-synthesized when the controller asks for a faster rate than it was made at.
+    """
+    def __init__(self, translator, tts, executor, on_audio, languages, translate_concurrency: int = 2, tts_concurrency: int = 2,
+                 streaming: bool = config.TTS_STREAMING, on_sentence_end=None,
+                 batch_window_ms: float = config.TRANSLATOR_BATCH_WINDOW_MS, tracker=None, on_translated=None,
+                 controller=None, on_merged=None):
+        """
+        Configure the stages; worker tasks start lazily on the first submitted sentence.
+        `tts_concurrency` is the number of TTS workers per language. With `streaming`, audio chunks
+        are released as the TTS service produces them rather than once per sentence. With a
+        `batch_window_ms` > 0, sentences waiting for translation share Translator requests.
+        `tracker` (a LatencyTracker, optional) receives the translated/synthesized stage marks.
+        """
+        self.translator = translator
+        self.tts = tts
+        self.executor = executor
+        self.languages = list(languages)
+        self.translate_concurrency = translate_concurrency
+        self.tts_concurrency = tts_concurrency
+        self.streaming = streaming and hasattr(tts, 'stream_text_to_speech')
+        self.tracker = tracker
+        self.on_translated = on_translated
+        self.controller = controller
+        self.on_merged = on_merged
+        self.batcher = None
+        if batch_window_ms > 0 and hasattr(translator, 'translate_batch'):
+            self.batcher = TranslationBatcher(translator, executor, window_ms=batch_window_ms)
+        self.sequencers = {
+            lang: Sequencer(functools.partial(on_audio, lang),
+                            functools.partial(on_sentence_end, lang) if on_sentence_end else None)
+            for lang in self.languages
+        }
+        self._translate_queue = asyncio.Queue()
+        self._tts_queues = {lang: asyncio.Queue() for lang in self.languages}
+        self._precomputed_audio = {}  # (seq, language) -> audio produced ahead of the TTS stage
+        self._last_job = {}  # language -> TTSJob most recently queued
+        self._next_seq = 0
+        self._workers = []
+
+    def submit(self, text: str, speculative=None) -> int:
+        """
+        Enqueue a completed sentence for translation and return its sequence number.
+        `speculative` is an optional task already producing (translations, audio by language)
+        for this text; its results are used instead of calling the services again.
+        """
+        self._ensure_started()
+        seq = self._next_seq
+        self._next_seq += 1
+        self._translate_queue.put_nowait((seq, text, speculative))
+        return seq
+
+    def _ensure_started(self):
+        if self._workers:
+            return
+        for i in range(self.translate_concurrency):
+            self._workers.append(asyncio.create_task(self._translate_worker(), name=f"translate-{i}"))
+        for lang in self.languages:
+            for i in range(self.tts_concurrency):
+                self._workers.append(asyncio.create_task(self._tts_worker(lang), name=f"tts-{lang}-{i}"))
+        logger.info("Started %s translate / %s TTS workers per language %s", self.translate_concurrency, self.tts_concurrency, self.languages)
+
+    async def _translate_worker(self):
+        while True:
+            items = [await self._translate_queue.get()]
+            if self.batcher:
+                # Sentences already waiting join this micro-batch
+                while len(items) < self.batcher.max_items and not self._translate_queue.empty():
+                    items.append(self._translate_queue.get_nowait())
+            try:
+                results = await asyncio.gather(*(self._translate(seq, text, speculative) for seq, text, speculative in items))
+                for (seq, text, _), translations in zip(items, results):
+                    if self.on_translated and translations:
+                        self.on_translated(seq, text, translations)
+                    await self._dispatch(seq, translations)
+            finally:
+                for _ in items:
+                    self._translate_queue.task_done()
+
+    async def _translate(self, seq: int, text: str, speculative=None) -> dict:
+        if speculative:
+            try:
+                translations, audio = await speculative
+                for lang, audio_data in audio.items():
+                    if audio_data:
+                        self._precomputed_audio[(seq, lang)] = audio_data
+                if translations:
+                    logger.debug("#%s using speculative results: %s", seq, translations)
+                    self._mark(seq, 'translated')
+                    return translations
+            except Exception as e:
+                logger.warning("#%s speculative results unavailable: %s", seq, e)
+        try:
+            if self.batcher:
+                translations = await self.batcher.translate(text, self.languages)
+            elif getattr(self.translator, 'async_client', None):
+                translations = await self.translator.translate_multi_async(text, self.languages)
+            else:
+                translations = await self.executor.run(self.translator.translate_multi, text, self.languages)
+            logger.debug("#%s translated: %s", seq, translations, extra={"seq": seq})
+            self._mark(seq, 'translated')
+            return translations
+        except Exception as e:
+            logger.error("#%s translation error: %s", seq, e, extra={"seq": seq})
+            return {}
+
+    def _mark(self, seq: int, stage: str, language: str = None):
+        if self.tracker:
+            self.tracker.mark(seq, stage, language)
+
+    async def _dispatch(self, seq: int, translations: dict):
+        for lang in self.languages:
+            translated = translations.get(lang)
+            if translated and self._merge(lang, seq, translated):
+                continue
+            if translated:
+                job = self._last_job[lang] = TTSJob(seq, translated)
+                self._tts_queues[lang].put_nowait(job)
+            else:
+                await self.sequencers[lang].complete(seq, b"")
+
+    def _merge(self, language: str, seq: int, translated: str) -> bool:
+        """
+        Append sentence `seq` to the job still queued right before it, when the controller asks to catch up.
+        """
+        job = self._last_job.get(language)
+        if (not self.controller or not job or job.started or job.seqs[-1] != seq - 1
+                or (seq, language) in self._precomputed_audio or (job.seqs[0], language) in self._precomputed_audio
+                or not self.controller.should_merge(language, job.text, translated)):
+            return False
+        job.seqs.append(seq)
+        job.text = f"{job.text} {translated}"
+        self.controller.merged(language, job.seqs)
+        if self.on_merged:
+            self.on_merged(language, list(job.seqs))
+        return True
+
+    async def _tts_worker(self, language: str):
+        queue = self._tts_queues[language]
+        while True:
+            job = await queue.get()
+            job.started = True
+            seq, translated = job.seqs[0], job.text
+            try:
+                precomputed = self._precomputed_audio.pop((seq, language), None)
+                rate = self.controller.decide(language, job.seqs) if self.controller else 1.0
+                if precomputed and rate not in (None, 1.0):
+                    logger.debug("#%s %s re-synthesizing speculative audio at rate %.2f", seq, language, rate,
+                                 extra={"seq": seq, "language": language})
+                if rate is None:
+                    audio_data, total = b"", 0
+                elif precomputed and rate == 1.0:
+                    audio_data, total = precomputed, len(precomputed)
+                elif self.streaming:
+                    total = await self._stream_tts(seq, language, translated, rate)
+                    audio_data = b""
+                else:
+                    async with lease_synthesizer(self.tts, translated, language, rate) as pooled:
+                        audio_data = await self.executor.run(self.tts.text_to_speech, translated, language,
+                                                             rate=rate, pooled=pooled)
+                    total = len(audio_data) if audio_data else 0
+                logger.debug("#%s %s TTS audio data size: %s bytes", seq, language, total,
+                             extra={"seq": seq, "language": language})
+                if rate is not None:
+                    # Sentences merged into this job were voiced by the same synthesis
+                    for voiced in job.seqs:
+                        self._mark(voiced, 'synthesized', language)
+            except Exception as e:
+                logger.error("#%s %s TTS error: %s", seq, language, e, extra={"seq": seq, "language": language})
+                audio_data = b""
+            try:
+                # Sentences merged into this job complete empty, after the audio that voiced them
+                await self.sequencers[language].complete(seq, audio_data)
+                for merged in job.seqs[1:]:
+                    await self.sequencers[language].complete(merged, b"")
+            finally:
+                queue.task_done()
+
+    async def _stream_tts(self, seq: int, language: str, translated: str, rate: float = 1.0) -> int:
+        """
+        Run streaming synthesis on the executor and hand each chunk to the sequencer as it arrives.
+        """
+        loop = asyncio.get_running_loop()
+        chunks = asyncio.Queue()
+
+        def produce(pooled):
+            try:
+                for chunk in self.tts.stream_text_to_speech(translated, language, rate=rate, pooled=pooled):
+                    loop.call_soon_threadsafe(chunks.put_nowait, chunk)
+            finally:
+                loop.call_soon_threadsafe(chunks.put_nowait, None)
+
+        async with lease_synthesizer(self.tts, translated, language, rate) as pooled:
+            job = asyncio.ensure_future(self.executor.run(produce, pooled))
+            total = 0
+            while (chunk := await chunks.get()) is not None:
+                total += len(chunk)
+                await self.sequencers[language].push(seq, chunk)
+            await job
+        return total
+
+    async def drain(self):
+        """
+        Wait until every submitted sentence has passed through all stages.
+        """
+        await self._translate_queue.join()
+        for queue in self._tts_queues.values():
+            await queue.join()
+
+    async def close(self):
+        """
+        Cancel the stage workers.
+        """
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
@@ -0,0 +1,133 @@
+"""
+recognition_bridge.py
+Hands Speech SDK recognition events from its callback threads to the event loop through a bounded
+queue, consumed by a single task so recognitions reach the segmenter one at a time, in order.
+"""
+
+import asyncio
+import collections
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
+import config
+from log import get_logger
+from tracing import percentile
+
+logger = get_logger(__name__)
+
+
+class RecognitionBridge:
+    """
+    Thread-safe handoff for recognition events:
+    - `recognized(text)` (final results) blocks the SDK thread while the queue is full, up to
+      `handoff_timeout` seconds, so a burst is delayed rather than lost;
+    - `recognizing(text)` (partial results) is dropped when the queue is full: a newer partial follows.
+    One consumer task awaits `on_final(text, recognized_at)` / calls `on_partial(text)` in arrival order.
+    Must be created on the event loop thread.
+    """
+    def __init__(self, on_final, on_partial=None, max_pending: int = config.RECOGNITION_QUEUE_SIZE,
+                 handoff_timeout: float = config.RECOGNITION_HANDOFF_TIMEOUT):
+        self._on_final = on_final
+        self._on_partial = on_partial
+        self.handoff_timeout = handoff_timeout
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._queue = asyncio.Queue(max_pending)
+        self._handoff = collections.deque(maxlen=1000)  # seconds from SDK callback to consumer
+        self.finals = 0
+        self.partials = 0
+        self.dropped_partials = 0
+        self.dropped_finals = 0
+        self.max_depth = 0
+        self._consumer = self._loop.create_task(self._consume())
+
+    # --- SDK callback threads ---
+
+    def recognized(self, text: str):
+        item = ("final", text, time.monotonic())
+        if threading.get_ident() == self._loop_thread:
+            # Already on the loop (e.g. a stand-in recognizer): waiting here would deadlock
+            self._offer(item)
+            return
+        try:
+            future = asyncio.run_coroutine_threadsafe(self._put_final(item), self._loop)
+        except RuntimeError:
+            self.dropped_finals += 1
+            logger.error("Dropped recognition, event loop closed: '%s'", text)
+            return
+        try:
+            # The loop decides (and counts) whether the final got in; this only bounds the wait when
+            # the loop itself is too busy to answer
+            future.result(self.handoff_timeout + 1.0)
+        except FutureTimeoutError:
+            logger.warning("Event loop did not accept recognition within %.1fs: '%s'", self.handoff_timeout + 1.0, text)
+
+    def recognizing(self, text: str):
+        try:
+            self._loop.call_soon_threadsafe(self._offer, ("partial", text, time.monotonic()))
+        except RuntimeError:
+            pass  # loop closed
+
+    # --- event loop ---
+
+    async def _put_final(self, item):
+        try:
+            await asyncio.wait_for(self._queue.put(item), self.handoff_timeout)
+        except asyncio.TimeoutError:
+            self.dropped_finals += 1
+            logger.error("Dropped recognition after %.1fs waiting for the pipeline: '%s'",
+                         self.handoff_timeout, item[1])
+
+    def _offer(self, item):
+        try:
+            self._queue.put_nowait(item)
+        except asyncio.QueueFull:
+            if item[0] == "final":
+                self.dropped_finals += 1
+                logger.error("Dropped recognition, queue full: '%s'", item[1])
+            else:
+                self.dropped_partials += 1
+
+    async def _consume(self):
+        while True:
+            kind, text, received_at = await self._queue.get()
+            self.max_depth = max(self.max_depth, self._queue.qsize() + 1)
+            self._handoff.append(time.monotonic() - received_at)
+            try:
+                if kind == "final":
+                    self.finals += 1
+                    await self._on_final(text, received_at)
+                elif self._on_partial:
+                    self.partials += 1
+                    self._on_partial(text)
+            except Exception as e:
+                logger.exception("Error handling %s recognition '%s': %s", kind, text, e)
+            finally:
+                self._queue.task_done()
+
+    async def drain(self):
+        """
+        Wait until every recognition handed over so far has been processed.
+        """
+        await self._queue.join()
+
+    async def close(self):
+        self._consumer.cancel()
+        await asyncio.gather(self._consumer, return_exceptions=True)
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def stats(self) -> dict:
+        ordered = sorted(self._handoff)
+        return {
+            "depth": self.depth,
+            "max_depth": self.max_depth,
+            "finals": self.finals,
+            "partials": self.partials,
+            "dropped_finals": self.dropped_finals,
+            "dropped_partials": self.dropped_partials,
+            "handoff_p50_ms": round(percentile(ordered, 0.50) * 1000, 2) if ordered else None,
+            "handoff_p99_ms": round(percentile(ordered, 0.99) * 1000, 2) if ordered else None,
+        }
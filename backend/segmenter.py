@@ -0,0 +1,196 @@
+"""
+segmenter.py
+Incremental segmentation of ASR text into translation-ready chunks: sentences, long clauses,
+a word cap and a max-wait timer, so segment length (and with it latency) stays bounded.
+"""
+
+import re
+import time
+from abc import ABC, abstractmethod
+from typing import List, Optional
+import config
+
+# Tokens ending in '.' that never end a sentence: titles and the like
+ABBREVIATIONS = {
+    'mr', 'mrs', 'ms', 'dr', 'st', 'jr', 'sr', 'prof', 'pr', 'fr', 'vs', 'cf',
+}
+
+# Scripture book and number abbreviations: only abbreviations when a number follows
+# ("Rom. 8", "1 Cor. 13", "Dan. 9:2", "v. 3", "No. 5"); "Pastor Dan. Let us pray." ends a sentence
+REFERENCE_ABBREVIATIONS = {
+    'no', 'vol', 'ch', 'chap', 'v', 'vv', 'p', 'pp',
+    'gen', 'ex', 'exod', 'lev', 'num', 'deut', 'josh', 'judg', 'sam', 'kgs', 'chr', 'neh', 'esth',
+    'ps', 'pss', 'prov', 'eccl', 'isa', 'jer', 'lam', 'ezek', 'dan', 'hos', 'obad', 'mic', 'nah',
+    'hab', 'zeph', 'hag', 'zech', 'mal', 'matt', 'mt', 'mk', 'lk', 'jn', 'rom', 'cor', 'gal', 'eph',
+    'phil', 'col', 'thess', 'tim', 'tit', 'philem', 'heb', 'jas', 'pet', 'jud', 'rev',
+}
+
+_SENTENCE_END = re.compile(r'[.!?]+["\'”’)\]]*$')
+_CLAUSE_END = re.compile(r'[,;:]["\'”’)\]]*$')
+_TOKEN = re.compile(r'\S+')
+
+
+def _word(token: str) -> str:
+    return token.rstrip('.').lstrip('("\'“‘[').lower()
+
+
+def _depends_on_next(token: str) -> bool:
+    """
+    Whether a token ending in '.' can only be told apart from a sentence end by the token after it.
+    """
+    word = _word(token)
+    return token.endswith('.') and (word in REFERENCE_ABBREVIATIONS or _is_initial(word))
+
+
+def _is_initial(word: str) -> bool:
+    # "I" and "A" are words; any other single letter followed by '.' is read as an initial ("J. Smith")
+    return len(word) == 1 and word.isalpha() and word not in ('i', 'a')
+
+
+def _is_abbreviation(token: str, following: Optional[str]) -> bool:
+    if not token.endswith('.'):
+        return False
+    word = _word(token)
+    # "e.g.", "a.m." or "U.S." are not sentence ends either
+    if word in ABBREVIATIONS or '.' in word:
+        return True
+    if word in REFERENCE_ABBREVIATIONS and following and following[0].isdigit():
+        return True
+    return _is_initial(word) and bool(following) and following[0].isupper()
+
+
+class Segmenter(ABC):
+    """
+    Segmenter interface: `feed` appends recognized text and returns the segments it completed;
+    `poll` and `flush` release the pending fragment on a timer or at end of stream.
+    """
+    @abstractmethod
+    def feed(self, text: str) -> List[str]:
+        ...
+
+    def poll(self, now: Optional[float] = None) -> Optional[str]:
+        return None
+
+    @abstractmethod
+    def flush(self) -> Optional[str]:
+        ...
+
+    @abstractmethod
+    def reset(self):
+        ...
+
+    @property
+    @abstractmethod
+    def pending(self) -> str:
+        ...
+
+
+class ClauseSegmenter(Segmenter):
+    """
+    Cuts at sentence ends, at clause punctuation (, ; :) once a segment has `clause_min_words`,
+    and unconditionally at `max_words`. Only text appended since the last call is scanned.
+    Abbreviations and scripture references ("John 3:16.", "Rom. 8:28") are handled: ':' inside
+    a reference is not followed by a space, and abbreviation periods are not sentence ends.
+    Whether "Dan." or "J." ends a sentence depends on the next word, so a trailing one is held
+    undecided until the next `feed` (or released by `poll`/`flush`).
+    `max_wait` seconds after a fragment started, `poll` releases it even without a boundary.
+    """
+    def __init__(self, clause_min_words: Optional[int] = config.SEGMENT_CLAUSE_MIN_WORDS,
+                 max_words: Optional[int] = config.SEGMENT_MAX_WORDS,
+                 max_wait: Optional[float] = config.SEGMENT_MAX_WAIT_SECONDS):
+        self.clause_min_words = clause_min_words
+        self.max_words = max_words
+        self.max_wait = max_wait
+        self._text = ""
+        self._scanned = 0  # offset in _text up to which tokens have been decided
+        self._words = 0  # words in _text[:_scanned]
+        self._started_at = None
+
+    @property
+    def pending(self) -> str:
+        return self._text.strip()
+
+    def feed(self, text: str) -> List[str]:
+        text = text.strip()
+        if not text:
+            return []
+        if not self._text:
+            self._started_at = time.monotonic()
+        self._text += (" " if self._text else "") + text
+        segments = []
+        consumed = 0  # offsets below come from the text as it was before any cut in this call
+        tokens = list(_TOKEN.finditer(self._text, self._scanned))
+        self._scanned = None
+        for token, following in zip(tokens, tokens[1:] + [None]):
+            if following is None and _depends_on_next(token.group()):
+                self._scanned = token.start() - consumed
+                break
+            self._words += 1
+            if self._is_boundary(token.group(), following and following.group()):
+                segments.append(self._cut(token.end() - consumed))
+                consumed = token.end()
+        if self._scanned is None:
+            self._scanned = len(self._text)
+        return segments
+
+    def _is_boundary(self, token: str, following: Optional[str]) -> bool:
+        if _SENTENCE_END.search(token) and not _is_abbreviation(token, following):
+            return True
+        if self.clause_min_words and self._words >= self.clause_min_words and _CLAUSE_END.search(token):
+            return True
+        return bool(self.max_words and self._words >= self.max_words)
+
+    def _cut(self, end: int) -> str:
+        segment, self._text = self._text[:end].strip(), self._text[end:]
+        self._words = 0
+        self._started_at = time.monotonic() if self._text.strip() else None
+        return segment
+
+    def poll(self, now: Optional[float] = None) -> Optional[str]:
+        if self.max_wait and self._started_at and (now or time.monotonic()) - self._started_at >= self.max_wait:
+            return self.flush()
+        return None
+
+    def flush(self) -> Optional[str]:
+        remaining = self.pending
+        self.reset()
+        return remaining or None
+
+    def reset(self):
+        self._text = ""
+        self._scanned = 0
+        self._words = 0
+        self._started_at = None
+
+
+class SentenceSegmenter(ClauseSegmenter):
+    """
+    Cuts at sentence ends only, with no word cap or timer (the original segmentation).
+    """
+    def __init__(self):
+        super().__init__(clause_min_words=None, max_words=None, max_wait=None)
+
+
+SEGMENTERS = {
+    'clause': ClauseSegmenter,
+    'sentence': SentenceSegmenter,
+}
+
+
+def create_segmenter(name: str = config.SEGMENTER) -> Segmenter:
+    """
+    Build the segmenter configured by name ('clause' or 'sentence').
+    """
+    if name not in SEGMENTERS:
+        raise ValueError(f"Unknown segmenter '{name}', expected one of {sorted(SEGMENTERS)}")
+    return SEGMENTERS[name]()
+
+
+def split_sentences(text: str) -> List[str]:
+    """
+    Split a complete text into sentences, keeping a trailing fragment as the last one.
+    """
+    segmenter = SentenceSegmenter()
+    sentences = segmenter.feed(text)
+    remaining = segmenter.flush()
+    return sentences + [remaining] if remaining else sentences
@@ -0,0 +1,300 @@
+"""
+server.py
+Builds the FastAPI app around injected ASR, translator and TTS services, so the same routes
+run against Azure (main.py) or local stand-ins (test/bench_load.py).
+"""
+
+import asyncio
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Response
+import config
+from broadcast_manager import ListenerDisconnected, POLICIES, START_MODES
+from orchestrator import Orchestrator
+from subtitles import SubtitleChannel
+from session_manager import SessionManager, RoomLimitReached, DEFAULT_ROOM
+from vad import SilenceDetector
+from pacer import Pacer
+from log import get_logger
+
+logger = get_logger(__name__)
+
+
+async def watch_disconnect(websocket: WebSocket, on_disconnect):
+    """
+    Wait for the client to go away and call `on_disconnect()`. Output-only clients never send, so
+    without a watcher a closed connection is only noticed on the next send.
+    """
+    try:
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+    finally:
+        on_disconnect()
+
+
+def create_app(asr_service, translator_service, tts_service, translation_cache=None, tts_cache=None,
+               hls_output=None, executor=None, languages=None) -> FastAPI:
+    """
+    Register the routes around the given services. Each room gets its own orchestrator and broadcast
+    manager from the session manager (`app.state.sessions`); the services and caches are shared.
+    Each room runs its blocking calls on its own executor unless a shared `executor` is given.
+    Caches and HLS output are optional; HLS carries the default room.
+    """
+    app = FastAPI()
+
+    def create_orchestrator(room_id, broadcast_manager):
+        return Orchestrator(
+            asr_service=asr_service,
+            translator_service=translator_service,
+            tts_service=tts_service,
+            broadcast_manager=broadcast_manager,
+            executor=executor,
+            languages=languages,
+            hls_output=hls_output if room_id == DEFAULT_ROOM else None,
+            subtitles=SubtitleChannel(languages or config.TARGET_LANGUAGES, archive_name=room_id),
+        )
+
+    sessions = SessionManager(create_orchestrator)
+    app.state.sessions = sessions
+
+    async def open_room(websocket: WebSocket, room_id: str):
+        """
+        Accept the connection and return its room, or close it and return None.
+        """
+        await websocket.accept()
+        try:
+            return sessions.get(room_id)
+        except ValueError as e:
+            await websocket.close(code=1008, reason=str(e))
+        except RoomLimitReached as e:
+            await websocket.close(code=1013, reason=str(e))
+        return None
+
+    @app.websocket("/ws/audio-in")
+    async def websocket_audio_in(websocket: WebSocket):
+        await websocket_audio_in_room(websocket, DEFAULT_ROOM)
+
+    @app.websocket("/ws/audio-in/{room_id}")
+    async def websocket_audio_in_room(websocket: WebSocket, room_id: str):
+        """
+        Accepts incoming audio chunks for one room (e.g. /ws/audio-in/overflow) and pushes them into
+        the room's orchestrator. No response is sent back; output is broadcast to the room's listeners.
+        With VAD enabled, pauses flush the pending text early and long silences are not sent to ASR.
+        """
+        room = await open_room(websocket, room_id)
+        if not room:
+            return
+        orchestrator = room.orchestrator
+        push_stream = recognizer = vad = None
+        room.speakers += 1
+        try:
+            room.touch()
+            # SDK callbacks run on the SDK's threads; the room's bridge hands them to the event loop in order
+            push_stream, recognizer = asr_service.create_streaming_recognizer(
+                room.recognition.recognized, room.recognition.recognizing if orchestrator.speculator else None)
+            recognizer.start_continuous_recognition()
+            vad = SilenceDetector() if config.VAD_ENABLED else None
+            while True:
+                audio_chunk = await websocket.receive_bytes()
+                if vad:
+                    audio_chunk, paused = vad.process(audio_chunk)
+                    if paused:
+                        orchestrator.end_of_speech()
+                logger.debug("audio-in chunk of %s bytes", len(audio_chunk), extra={"sampled": True})
+                if audio_chunk:
+                    if vad is None or vad.speaking:
+                        orchestrator.audio_received()
+                    push_stream.write(audio_chunk)
+        except WebSocketDisconnect:
+            logger.info("audio-in client disconnected")
+        except Exception as e:
+            logger.warning("audio-in error: %s", e)
+        finally:
+            if vad:
+                for key, value in vad.stats().items():
+                    room.ingest_stats[key] += value
+            if push_stream:
+                push_stream.close()
+            if recognizer:
+                # Stopping waits for the SDK's last callbacks, which may wait on this loop: keep it off the loop
+                await asyncio.to_thread(recognizer.stop_continuous_recognition)
+            await room.recognition.drain()
+            # Only flush if there is leftover buffer
+            if orchestrator.buffer.strip():
+                await orchestrator.flush()
+            room.speakers -= 1
+            room.touch()
+
+    @app.on_event("startup")
+    async def start_outputs():
+        if hasattr(translator_service, 'warm_up_async'):
+            await translator_service.warm_up_async()
+        if hls_output:
+            hls_output.start()
+        sessions.start()
+
+    @app.on_event("shutdown")
+    async def shutdown_pipeline():
+        if hls_output:
+            await hls_output.stop()
+        await sessions.close_all()
+        if executor:
+            executor.shutdown(wait=False)
+        for service in (translator_service, translation_cache, tts_service):
+            if hasattr(service, 'aclose'):
+                await service.aclose()
+            if hasattr(service, 'close'):
+                service.close()
+
+    @app.websocket("/ws/audio-out")
+    async def websocket_audio_out(websocket: WebSocket):
+        await websocket_audio_out_room(websocket, DEFAULT_ROOM, config.DEFAULT_LANGUAGE)
+
+    @app.websocket("/ws/audio-out/{lang}")
+    async def websocket_audio_out_language(websocket: WebSocket, lang: str):
+        await websocket_audio_out_room(websocket, DEFAULT_ROOM, lang)
+
+    @app.websocket("/ws/audio-out/{room_id}/{lang}")
+    async def websocket_audio_out_room(websocket: WebSocket, room_id: str, lang: str):
+        """
+        Streams translated audio for one room and target language (e.g. /ws/audio-out/overflow/te) to a listener.
+        `?start=live|sentence|rewind&seconds=N` chooses where it starts; earlier audio is replayed from memory.
+        By default the queued chunks are sent as raw audio, as existing clients expect; with `?paced=1` audio is
+        paced at real-time rate in packets with a timing header (see pacer.HEADER).
+        """
+        room = await open_room(websocket, room_id)
+        if not room:
+            return
+        orchestrator = room.orchestrator
+        broadcast_manager = room.broadcast
+        if lang not in orchestrator.languages:
+            await websocket.close(code=1008, reason=f"Unsupported language: {lang}")
+            room.touch()
+            return
+        policy = websocket.query_params.get("policy", config.LISTENER_QUEUE_POLICY)
+        if policy not in POLICIES:
+            await websocket.close(code=1008, reason=f"Unsupported queue policy: {policy}")
+            return
+        start = websocket.query_params.get("start", config.LATE_JOIN_START)
+        try:
+            seconds = float(websocket.query_params.get("seconds", 0))
+        except ValueError:
+            seconds = -1
+        if start not in START_MODES or seconds < 0:
+            await websocket.close(code=1008, reason=f"Unsupported start position: {start}")
+            return
+        queue = await broadcast_manager.register(websocket, lang, policy, start, seconds)
+        room.touch()
+        # Framed delivery is opt-in: a client that does not strip the header would play it as noise
+        paced = websocket.query_params.get("paced") == "1"
+        pacer = Pacer(pcm=orchestrator.encoders[lang].codec == "pcm") if paced else None
+
+        watcher = asyncio.create_task(watch_disconnect(websocket, lambda: queue.close("client disconnected")))
+        traced_seq = None
+        try:
+            while True:
+                audio_bytes = await queue.get()
+                if pacer:
+                    await pacer.send(websocket, audio_bytes, queue.last_seq, queue.last_seconds)
+                else:
+                    await websocket.send_bytes(audio_bytes)
+                if not queue.last_replayed and queue.last_seq != traced_seq:
+                    # First audio of a sentence reaching this listener
+                    traced_seq = queue.last_seq
+                    orchestrator.tracker.mark(traced_seq, 'sent', lang)
+                logger.debug("audio-out sent %s bytes of #%s", len(audio_bytes), queue.last_seq,
+                             extra={"sampled": True, "seq": queue.last_seq, "language": lang})
+        except ListenerDisconnected as e:
+            if not watcher.done():
+                logger.warning("Dropping slow listener: %s", e)
+                await websocket.close(code=1013, reason="Listener too far behind live")
+        except Exception as e:
+            logger.info("audio-out client disconnected: %s", e)
+        finally:
+            watcher.cancel()
+            await broadcast_manager.unregister(websocket, lang)
+            room.touch()
+
+    @app.websocket("/ws/text-out/{lang}")
+    async def websocket_text_out_language(websocket: WebSocket, lang: str):
+        await websocket_text_out_room(websocket, DEFAULT_ROOM, lang)
+
+    @app.websocket("/ws/text-out/{room_id}/{lang}")
+    async def websocket_text_out_room(websocket: WebSocket, room_id: str, lang: str):
+        """
+        Streams subtitles for one room and target language as JSON messages: each sentence with its
+        translation as soon as it is translated, then its playout timing once its audio is scheduled.
+        """
+        room = await open_room(websocket, room_id)
+        if not room:
+            return
+        subtitles = room.orchestrator.subtitles
+        if lang not in subtitles.languages:
+            await websocket.close(code=1008, reason=f"Unsupported language: {lang}")
+            room.touch()
+            return
+        queue = subtitles.subscribe(lang)
+        room.touch()
+
+        watcher = asyncio.create_task(watch_disconnect(websocket, lambda: queue.put_nowait(None)))
+        try:
+            while (message := await queue.get()) is not None:
+                await websocket.send_json(message)
+            if not watcher.done():
+                await websocket.close(code=1001, reason="Room closed")
+        except Exception as e:
+            logger.info("text-out client disconnected: %s", e)
+        finally:
+            watcher.cancel()
+            subtitles.unsubscribe(lang, queue)
+            room.touch()
+
+    @app.get("/subtitles/{room_id}/{lang}.vtt")
+    async def subtitles_vtt(room_id: str, lang: str):
+        """
+        WebVTT of a room's subtitles in one language so far.
+        """
+        room = sessions.rooms.get(room_id)
+        if not room or lang not in room.orchestrator.subtitles.languages:
+            raise HTTPException(status_code=404)
+        return Response(room.orchestrator.subtitles.vtt(lang), media_type="text/vtt", headers={"Cache-Control": "no-cache"})
+
+    @app.get("/metrics")
+    async def metrics():
+        """
+        Live pipeline metrics: shared cache/pool effectiveness, and per room the listener lag
+        (queued bytes, seconds behind live, drops), ingest totals and stage latency.
+        """
+        return {"translation_cache": translation_cache.stats() if translation_cache else None,
+                "tts_cache": tts_cache.stats() if tts_cache else None,
+                "tts_pool": tts_service.pool.stats() if hasattr(tts_service, 'pool') else None,
+                "rooms": sessions.stats()}
+
+    @app.get("/metrics/traces")
+    async def metrics_traces(room: str = DEFAULT_ROOM, limit: int = 20):
+        """
+        Stage timestamps of a room's most recent segments, in milliseconds since their audio was received.
+        """
+        if room not in sessions.rooms:
+            raise HTTPException(status_code=404)
+        return sessions.rooms[room].orchestrator.tracker.recent(limit)
+
+    @app.get("/hls/{lang}/playlist.m3u8")
+    async def hls_playlist(lang: str):
+        """
+        Live HLS playlist for one language; short-lived so CDNs and players refresh the live edge.
+        """
+        if not hls_output or lang not in hls_output.segmenters:
+            raise HTTPException(status_code=404)
+        return Response(hls_output.segmenters[lang].playlist(), media_type="application/vnd.apple.mpegurl",
+                        headers={"Cache-Control": "max-age=1"})
+
+    @app.get("/hls/{lang}/segment_{number}.mp3")
+    async def hls_segment(lang: str, number: int):
+        """
+        One immutable MP3 segment from the rolling window; 404 once it has aged out.
+        """
+        data = hls_output.segmenters[lang].segment(number) if hls_output and lang in hls_output.segmenters else None
+        if data is None:
+            raise HTTPException(status_code=404)
+        return Response(data, media_type="audio/mpeg", headers={"Cache-Control": "public, max-age=3600, immutable"})
+
+    return app
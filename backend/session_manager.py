@@ -0,0 +1,137 @@
+"""
+session_manager.py
+Room-scoped pipelines: each sermon room (main hall, overflow room, a Zoom session) has its own
+orchestrator, text buffer, listener set and blocking-call executor, while the translator/TTS
+clients and caches are shared by every room in the process.
+"""
+
+import asyncio
+import re
+import time
+from typing import Callable, Dict
+from broadcast_manager import BroadcastManager
+from recognition_bridge import RecognitionBridge
+import config
+from log import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_ROOM = "main"
+_ROOM_ID = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+class RoomLimitReached(Exception):
+    """
+    Raised by SessionManager.get() when a new room would exceed the configured maximum.
+    """
+
+
+class Room:
+    """
+    One session: orchestrator (buffer, segmenter, pipeline, tracker), broadcast manager, ingest stats,
+    and the recognition bridge through which every speaker's ASR results reach the orchestrator in order.
+    Created on the event loop thread.
+    """
+    def __init__(self, room_id: str, orchestrator, broadcast_manager: BroadcastManager):
+        self.room_id = room_id
+        self.orchestrator = orchestrator
+        self.broadcast = broadcast_manager
+        self.recognition = RecognitionBridge(orchestrator.process_text, orchestrator.process_partial)
+        self.speakers = 0  # open /ws/audio-in connections
+        # Totals over finished ingest sessions: audio forwarded to / kept from ASR, detected pauses
+        self.ingest_stats = {"forwarded_seconds": 0.0, "skipped_seconds": 0.0, "pauses": 0}
+        self.created_at = time.time()
+        self.idle_since = time.monotonic()
+
+    @property
+    def listeners(self) -> int:
+        return (sum(self.broadcast.listener_count(lang) for lang in self.orchestrator.languages)
+                + self.orchestrator.subtitles.subscriber_count)
+
+    def touch(self):
+        """
+        Record activity; the idle timer restarts once the last speaker and listener have left.
+        """
+        self.idle_since = None if self.speakers or self.listeners else time.monotonic()
+
+    def stats(self) -> dict:
+        orchestrator = self.orchestrator
+        return {
+            "speakers": self.speakers,
+            "listeners": self.broadcast.stats(),
+            "history": self.broadcast.history_stats(),
+            "subtitles": orchestrator.subtitles.stats(),
+            "translation_batches": orchestrator.pipeline.batcher.stats() if orchestrator.pipeline.batcher else None,
+            "speculation": orchestrator.speculator.stats() if orchestrator.speculator else None,
+            "ingest": self.ingest_stats,
+            "recognition": self.recognition.stats(),
+            "latency": orchestrator.tracker.stats(),
+            "latency_control": orchestrator.controller.stats() if orchestrator.controller else None,
+        }
+
+
+class SessionManager:
+    """
+    Creates rooms on first use and closes them after `idle_seconds` without speakers or listeners.
+    `create_orchestrator(room_id, broadcast_manager)` builds a room's orchestrator around the shared services.
+    """
+    def __init__(self, create_orchestrator: Callable, idle_seconds: float = config.ROOM_IDLE_SECONDS,
+                 max_rooms: int = config.MAX_ROOMS):
+        self._create_orchestrator = create_orchestrator
+        self.idle_seconds = idle_seconds
+        self.max_rooms = max_rooms
+        self.rooms: Dict[str, Room] = {}
+        self._reaper = None
+
+    @staticmethod
+    def valid_room_id(room_id: str) -> bool:
+        return bool(_ROOM_ID.match(room_id))
+
+    def get(self, room_id: str) -> Room:
+        """
+        The room with this id, created if needed. Raises ValueError for a malformed id and
+        RoomLimitReached when the process already serves `max_rooms` rooms.
+        """
+        room = self.rooms.get(room_id)
+        if room:
+            return room
+        if not self.valid_room_id(room_id):
+            raise ValueError(f"Invalid room id: {room_id!r}")
+        if len(self.rooms) >= self.max_rooms:
+            raise RoomLimitReached(f"{self.max_rooms} rooms already open")
+        broadcast = BroadcastManager()
+        room = Room(room_id, self._create_orchestrator(room_id, broadcast), broadcast)
+        self.rooms[room_id] = room
+        logger.info("Opened room '%s' (%s open)", room_id, len(self.rooms))
+        return room
+
+    def start(self):
+        self._reaper = asyncio.create_task(self._close_idle_rooms())
+
+    async def _close_idle_rooms(self):
+        while True:
+            await asyncio.sleep(min(self.idle_seconds, 30))
+            now = time.monotonic()
+            for room in list(self.rooms.values()):
+                if room.idle_since is not None and now - room.idle_since >= self.idle_seconds:
+                    await self.close(room.room_id)
+
+    async def close(self, room_id: str):
+        """
+        Stop a room's pipeline and forget it; a later connection opens it afresh.
+        """
+        room = self.rooms.pop(room_id, None)
+        if room:
+            await room.recognition.close()
+            await room.orchestrator.close()
+            logger.info("Closed room '%s' (%s open)", room_id, len(self.rooms))
+
+    async def close_all(self):
+        if self._reaper:
+            self._reaper.cancel()
+            self._reaper = None
+        for room_id in list(self.rooms):
+            await self.close(room_id)
+
+    def stats(self) -> dict:
+        return {room_id: room.stats() for room_id, room in self.rooms.items()}
@@ -0,0 +1,141 @@
+"""
+speculation.py
+Speculative translation + TTS of stable clause prefixes from ASR partial (`recognizing`) hypotheses.
+"""
+
+import asyncio
+import re
+from typing import List, Optional, Tuple
+import config
+from pipeline import lease_synthesizer
+from log import get_logger
+
+logger = get_logger(__name__)
+
+# Words that usually open a new clause; the boundary lies just before them. Partial hypotheses
+# carry no punctuation, so these (and any punctuation that does appear) mark clause ends.
+CLAUSE_OPENERS = {
+    'and', 'but', 'or', 'so', 'because', 'when', 'while', 'if', 'then', 'that', 'which', 'who',
+    'where', 'although', 'though', 'unless', 'until', 'since', 'after', 'before',
+}
+
+
+def _words(text: str) -> List[str]:
+    """
+    Comparable word form: lower case without surrounding punctuation (partials vs. final display text).
+    """
+    return [w for w in (re.sub(r"^\W+|\W+$", "", token).lower() for token in text.split()) if w]
+
+
+class Speculator:
+    """
+    Watches partial hypotheses for the current utterance. Once a prefix has stayed unchanged for
+    `stable_partials` consecutive partials and ends on a clause boundary, its translation and TTS
+    are started ahead of the final result. When the final arrives, speculated clauses that match
+    it word for word are handed over with their results; anything else is cancelled.
+    """
+    def __init__(self, translator, tts, executor, languages,
+                 stable_partials: int = config.SPECULATION_STABLE_PARTIALS,
+                 min_words: int = config.SPECULATION_MIN_WORDS):
+        self.translator = translator
+        self.tts = tts
+        self.executor = executor
+        self.languages = list(languages)
+        self.stable_partials = stable_partials
+        self.min_words = min_words
+        self.launched = 0
+        self.confirmed = 0
+        self.cancelled = 0
+        self._history = []  # word lists of the latest partials
+        self._segments = []  # [(words, task)], contiguous from the start of the pending text
+
+    def observe(self, pending: str, partial: str):
+        """
+        Feed a partial hypothesis; `pending` is the not-yet-segmented text it continues.
+        """
+        words = _words(pending) + _words(partial)
+        self._history = (self._history + [words])[-self.stable_partials:]
+        if len(self._history) < self.stable_partials:
+            return
+        stable = self._common_prefix(self._history)
+
+        # Drop speculation the recognizer has since revised
+        start = 0
+        for i, (segment, task) in enumerate(self._segments):
+            if stable[start:start + len(segment)] != segment:
+                self._cancel(self._segments[i:])
+                self._segments = self._segments[:i]
+                break
+            start += len(segment)
+
+        end = self._clause_end(stable, start)
+        if end:
+            segment = stable[start:end]
+            task = asyncio.create_task(self._prepare(" ".join(segment)))
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())  # never leave errors unretrieved
+            self._segments.append((segment, task))
+            self.launched += 1
+            logger.debug("Speculating on: '%s'", ' '.join(segment))
+
+    @staticmethod
+    def _common_prefix(histories: List[List[str]]) -> List[str]:
+        prefix = []
+        for column in zip(*histories):
+            if any(word != column[0] for word in column):
+                break
+            prefix.append(column[0])
+        return prefix
+
+    def _clause_end(self, words: List[str], start: int) -> Optional[int]:
+        """
+        The latest clause boundary after `start` leaving at least `min_words` in the clause.
+        Requires a stable word after the boundary, so the clause itself is complete.
+        """
+        for end in range(len(words) - 1, start + self.min_words - 1, -1):
+            if words[end] in CLAUSE_OPENERS:
+                return end
+        return None
+
+    async def _prepare(self, text: str) -> Tuple[dict, dict]:
+        translations = await self.executor.run(self.translator.translate_multi, text, self.languages)
+
+        async def synthesize(lang):
+            async with lease_synthesizer(self.tts, translations[lang], lang) as pooled:
+                return lang, await self.executor.run(self.tts.text_to_speech, translations[lang], lang, pooled=pooled)
+
+        audio = dict(await asyncio.gather(*(synthesize(lang) for lang in translations)))
+        return translations, audio
+
+    def reconcile(self, pending: str) -> Tuple[List[Tuple[str, asyncio.Task]], str]:
+        """
+        Match speculated clauses against the final `pending` text. Returns the confirmed clauses as
+        (source text from the final, task with (translations, audio)), in order, plus the remainder.
+        """
+        tokens = pending.split()
+        final_words = [_words(token) for token in tokens]
+        confirmed = []
+        position = 0  # token index in the final text
+        for i, (segment, task) in enumerate(self._segments):
+            taken, end = [], position
+            while end < len(tokens) and len(taken) < len(segment):
+                taken.extend(final_words[end])
+                end += 1
+            if taken != segment or end >= len(tokens):
+                self._cancel(self._segments[i:])
+                break
+            confirmed.append((" ".join(tokens[position:end]), task))
+            position = end
+        self.confirmed += len(confirmed)
+        self._segments = []
+        self._history = []
+        if confirmed:
+            logger.debug("Confirmed %s speculated clause(s)", len(confirmed))
+        return confirmed, " ".join(tokens[position:])
+
+    def _cancel(self, segments):
+        for _, task in segments:
+            task.cancel()
+        self.cancelled += len(segments)
+
+    def stats(self) -> dict:
+        return {'launched': self.launched, 'confirmed': self.confirmed, 'cancelled': self.cancelled}
@@ -0,0 +1,204 @@
+"""
+subtitles.py
+Subtitle channel: source and translated sentences as small JSON messages per language (a few bytes
+per second, for listeners on weak connections), plus an incremental WebVTT archive per language.
+"""
+
+import asyncio
+import collections
+import os
+import queue
+import threading
+import time
+from typing import Dict, List, Optional
+import config
+from log import get_logger
+
+logger = get_logger(__name__)
+
+
+def _vtt_time(seconds: float) -> str:
+    milliseconds = int(round(seconds * 1000))
+    hours, milliseconds = divmod(milliseconds, 3600_000)
+    minutes, milliseconds = divmod(milliseconds, 60_000)
+    return f"{hours:02d}:{minutes:02d}:{milliseconds / 1000:06.3f}"
+
+
+class WebVTTArchive:
+    """
+    WebVTT document of one language, grown cue by cue; appended to `path` as it grows when given.
+    The file is only created with the first cue, so rooms that never speak leave nothing on disk.
+    Cue times are seconds since the session started.
+    Appends go through a queue to a writer thread (started with the first cue), so `add` never
+    waits on the disk; `close` waits for the queued cues to be written.
+    """
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.cues: List[str] = []
+        self._writes = queue.Queue()
+        self._writer = None
+        self._created = False  # only touched by the writer thread
+
+    def add(self, seq: int, start: float, end: float, text: str):
+        text = text.replace("-->", "->")  # not allowed inside a cue
+        cue = f"{seq}\n{_vtt_time(start)} --> {_vtt_time(end)}\n{text}\n\n"
+        self.cues.append(cue)
+        if self.path:
+            if not self._writer:
+                self._writer = threading.Thread(target=self._write_loop, name="subtitle-archive-writer", daemon=True)
+                self._writer.start()
+            self._writes.put(cue)
+
+    def _write_loop(self):
+        """
+        Append queued cues to the file, one open per burst, until close() sends None.
+        """
+        unwritten = []  # cues held back until the file could be created
+        while True:
+            cues = [self._writes.get()]
+            while not self._writes.empty():
+                cues.append(self._writes.get_nowait())
+            stop = None in cues
+            cues = unwritten + [cue for cue in cues if cue is not None]
+            if cues:
+                try:
+                    if not self._created:
+                        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                    with open(self.path, "a" if self._created else "w", encoding="utf-8") as f:
+                        f.write(("" if self._created else "WEBVTT\n\n") + "".join(cues))
+                    self._created = True
+                    unwritten = []
+                except OSError as e:
+                    logger.warning("Failed to append to %s: %s", self.path, e)
+                    unwritten = [] if self._created else cues
+            if stop:
+                return
+
+    def close(self):
+        """
+        Write out the queued cues and stop the writer thread.
+        """
+        if not self._writer:
+            return
+        self._writes.put(None)
+        self._writer.join()
+        self._writer = None
+
+    def document(self) -> str:
+        return "WEBVTT\n\n" + "".join(self.cues)
+
+
+class SubtitleChannel:
+    """
+    Per-language subtitle fan-out for one session. `sentence()` publishes a translated sentence as
+    soon as its translation is ready (ahead of its audio); `timing()` publishes when its audio played
+    and adds the WebVTT cue. Each subscriber has a bounded queue that drops its oldest messages,
+    and new subscribers first receive the last `history` sentences.
+    """
+    def __init__(self, languages, archive_name: Optional[str] = None, archive_dir: str = config.SUBTITLE_ARCHIVE_DIR,
+                 history: int = config.SUBTITLE_HISTORY, max_queued: int = 100):
+        self.languages = list(languages)
+        self.started_at = time.monotonic()
+        self.max_queued = max_queued
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        self.archives: Dict[str, WebVTTArchive] = {
+            lang: WebVTTArchive(os.path.join(archive_dir, f"{archive_name}-{stamp}-{lang}.vtt")
+                                if archive_dir and archive_name else None)
+            for lang in self.languages
+        }
+        self._recent = {lang: collections.deque(maxlen=history) for lang in self.languages}
+        self._subscribers = {lang: set() for lang in self.languages}
+        self._pending = {}  # seq -> {language: translation} still waiting for its cue
+        self._absorbed = {}  # (seq, language) -> later sentences whose text joined seq's cue
+
+    def subscribe(self, language: str) -> asyncio.Queue:
+        """
+        Queue of JSON messages for one subscriber, starting with the most recent sentences.
+        """
+        queue = asyncio.Queue()
+        for message in self._recent[language]:
+            queue.put_nowait(message)
+        self._subscribers[language].add(queue)
+        return queue
+
+    def unsubscribe(self, language: str, queue: asyncio.Queue):
+        self._subscribers[language].discard(queue)
+
+    @property
+    def subscriber_count(self) -> int:
+        return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    def _publish(self, language: str, message: dict):
+        for queue in self._subscribers[language]:
+            if queue.qsize() >= self.max_queued:
+                queue.get_nowait()
+            queue.put_nowait(message)
+
+    def _now(self) -> float:
+        return round(time.monotonic() - self.started_at, 3)
+
+    def sentence(self, seq: int, source: str, translations: dict):
+        translations = {lang: text for lang, text in translations.items() if text and lang in self._recent}
+        if translations:
+            self._pending[seq] = dict(translations)
+        for lang, text in translations.items():
+            message = {"type": "sentence", "seq": seq, "source": source, "translation": text, "time": self._now()}
+            self._recent[lang].append(message)
+            self._publish(lang, message)
+
+    def merge(self, language: str, seqs: List[int]):
+        """
+        Sentences `seqs` are voiced as one utterance in `language`: their text becomes a single cue,
+        timed by the audio of `seqs[0]`.
+        """
+        head = self._pending.get(seqs[0], {})
+        if language not in head:
+            return
+        for seq in seqs[1:]:
+            pending = self._pending.get(seq, {})
+            text = pending.pop(language, None)
+            if not pending:
+                self._pending.pop(seq, None)
+            if text:
+                head[language] = f"{head[language]} {text}"
+                self._absorbed.setdefault((seqs[0], language), []).append(seq)
+
+    def timing(self, language: str, seq: int, start: float, seconds: float):
+        """
+        Sentence `seq` started playing at `start` (time.monotonic) and lasts `seconds`.
+        """
+        pending = self._pending.get(seq, {})
+        text = pending.pop(language, None)
+        if not pending:
+            self._pending.pop(seq, None)
+        if not text:
+            return
+        start -= self.started_at
+        # A sentence without audio (TTS failed) still gets a readable cue
+        end = start + (seconds or max(2.0, len(text) / 14))
+        self.archives[language].add(seq, start, end, text)
+        for timed in (seq, *self._absorbed.pop((seq, language), ())):
+            self._publish(language, {"type": "timing", "seq": timed, "start": round(start, 3), "end": round(end, 3)})
+
+    def close(self):
+        """
+        End every subscription: their queues yield None.
+        """
+        for subscribers in self._subscribers.values():
+            for queue in subscribers:
+                queue.put_nowait(None)
+            subscribers.clear()
+
+    def close_archives(self):
+        """
+        Wait for every language's archive to reach disk. Blocks: call it off the event loop.
+        """
+        for archive in self.archives.values():
+            archive.close()
+
+    def vtt(self, language: str) -> str:
+        return self.archives[language].document()
+
+    def stats(self) -> dict:
+        return {lang: {"listeners": len(self._subscribers[lang]), "cues": len(self.archives[lang].cues)}
+                for lang in self.languages}
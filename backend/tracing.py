@@ -0,0 +1,126 @@
+"""
+tracing.py
+Per-segment latency tracing: each segment (pipeline sequence number) collects stage timestamps
+from audio ingest to delivery, and the LatencyTracker aggregates p50/p95/p99 per stage.
+"""
+
+import collections
+import time
+from typing import Dict, List, Optional
+
+# Stage -> the stage its latency is measured from
+STAGES = {
+    'recognized': 'audio_received',  # includes the time the utterance was being spoken
+    'segmented': 'recognized',
+    'translated': 'segmented',
+    'synthesized': 'translated',  # per language, whole sentence synthesized
+    'first_byte_enqueued': 'translated',  # per language, first audio handed to the broadcast layer
+    'sent': 'first_byte_enqueued',  # per language and listener
+    'end_to_end': 'audio_received',  # first audio sent to a listener
+}
+PER_LANGUAGE = {'synthesized', 'first_byte_enqueued', 'sent', 'end_to_end'}
+
+
+class SegmentTrace:
+    """
+    Timestamps (time.monotonic) of one segment; per-language stages are keyed (stage, language).
+    """
+    def __init__(self, segment_id: int, text: str, marks: Dict[str, float]):
+        self.segment_id = segment_id
+        self.text = text
+        self.marks = dict(marks)
+
+    def get(self, stage: str, language: Optional[str] = None) -> Optional[float]:
+        if stage in PER_LANGUAGE:
+            return self.marks.get((stage, language))
+        return self.marks.get(stage)
+
+    def to_dict(self) -> dict:
+        origin = self.marks.get('audio_received') or self.marks.get('recognized') or 0.0
+        return {
+            'segment_id': self.segment_id,
+            'text': self.text,
+            'marks_ms': {(f"{key[0]}:{key[1]}" if isinstance(key, tuple) else key): round((at - origin) * 1000, 1)
+                         for key, at in self.marks.items()},
+        }
+
+
+def percentile(ordered: List[float], fraction: float) -> float:
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class LatencyTracker:
+    """
+    Keeps the most recent `max_traces` segment traces and a sliding window of `window` latency
+    samples per stage. Marks for unknown (evicted) segments are ignored.
+    """
+    def __init__(self, window: int = 1000, max_traces: int = 256):
+        self.window = window
+        self.max_traces = max_traces
+        self._traces = collections.OrderedDict()  # segment_id -> SegmentTrace
+        self._samples = {stage: collections.deque(maxlen=window) for stage in STAGES}
+
+    def begin(self, segment_id: int, text: str, audio_received: Optional[float] = None,
+              recognized: Optional[float] = None, segmented: Optional[float] = None) -> SegmentTrace:
+        """
+        Start the trace of a segment handed to the pipeline; earlier stage times are passed in.
+        """
+        marks = {'segmented': segmented or time.monotonic()}
+        if recognized:
+            marks['recognized'] = recognized
+        if audio_received:
+            marks['audio_received'] = audio_received
+        trace = SegmentTrace(segment_id, text, marks)
+        self._traces[segment_id] = trace
+        while len(self._traces) > self.max_traces:
+            self._traces.popitem(last=False)
+        for stage in ('recognized', 'segmented'):
+            self._sample(trace, stage, None, marks.get(stage))
+        return trace
+
+    def mark(self, segment_id: int, stage: str, language: Optional[str] = None, at: Optional[float] = None):
+        """
+        Record that `segment_id` reached `stage` (for `language`, for per-language stages).
+        'sent' is recorded once per listener; other stages keep their first timestamp.
+        """
+        trace = self._traces.get(segment_id)
+        if trace is None:
+            return
+        at = at or time.monotonic()
+        key = (stage, language) if stage in PER_LANGUAGE else stage
+        if stage != 'sent' and key in trace.marks:
+            return
+        trace.marks.setdefault(key, at)
+        self._sample(trace, stage, language, at)
+        if stage == 'sent':
+            self._sample(trace, 'end_to_end', language, at)
+
+    def _sample(self, trace: SegmentTrace, stage: str, language: Optional[str], at: Optional[float]):
+        reference = STAGES.get(stage)
+        start = trace.get(reference, language) if reference else None
+        if at is not None and start is not None:
+            self._samples[stage].append(at - start)
+
+    def trace(self, segment_id: int) -> Optional[SegmentTrace]:
+        return self._traces.get(segment_id)
+
+    def recent(self, limit: int = 20) -> List[dict]:
+        return [trace.to_dict() for trace in list(self._traces.values())[-limit:]]
+
+    def stats(self) -> dict:
+        """
+        p50/p95/p99 in milliseconds per stage, each measured from the stage it follows (see STAGES).
+        """
+        result = {}
+        for stage, samples in self._samples.items():
+            if not samples:
+                continue
+            ordered = sorted(samples)
+            result[stage] = {
+                'since': STAGES[stage],
+                'count': len(ordered),
+                'p50_ms': round(percentile(ordered, 0.50) * 1000, 1),
+                'p95_ms': round(percentile(ordered, 0.95) * 1000, 1),
+                'p99_ms': round(percentile(ordered, 0.99) * 1000, 1),
+            }
+        return result
@@ -0,0 +1,149 @@
+"""
+translation_cache.py
+LRU cache of Translator results with SQLite persistence, so repeated phrases skip the API entirely
+and the next service starts warm.
+"""
+
+import collections
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+from typing import Optional, Tuple
+import config
+from log import get_logger
+
+logger = get_logger(__name__)
+
+
+def normalize_text(text: str) -> str:
+    """
+    Cache-key form of a source sentence: surrounding and repeated whitespace removed.
+    Case and punctuation are kept because they change the translation.
+    """
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+class TranslationCache:
+    """
+    Thread-safe, size-bounded LRU keyed by (normalized source text, source lang, target lang,
+    glossary version). Entries are written through to a SQLite file when `path` is set; on close
+    the in-memory recency order is saved, and on startup the most recently used `max_entries`
+    are loaded back while older rows are pruned, so the file stays bounded too.
+    Writes go through a queue to a single writer thread, so `put` never waits on SQLite and
+    `get` (called on the event loop) only ever waits for an in-memory update.
+    """
+    def __init__(self, path: Optional[str] = config.TRANSLATION_CACHE_PATH,
+                 max_entries: int = config.TRANSLATION_CACHE_MAX_ENTRIES,
+                 glossary_version: str = config.GLOSSARY_VERSION):
+        self.max_entries = max_entries
+        self.glossary_version = glossary_version
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self._writes = queue.Queue()
+        self._writer = None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS translations ("
+                " source TEXT, source_lang TEXT, target_lang TEXT, glossary TEXT, translation TEXT,"
+                " used_at REAL,"
+                " PRIMARY KEY (source, source_lang, target_lang, glossary))"
+            )
+            self._db.commit()
+            self._load()
+            self._writer = threading.Thread(target=self._write_loop, name="translation-cache-writer", daemon=True)
+            self._writer.start()
+        logger.info("%s entries loaded from %s", len(self._entries), path or 'memory only')
+
+    def _key(self, text: str, source_lang: str, target_lang: str) -> Tuple[str, str, str, str]:
+        return (normalize_text(text), source_lang, target_lang, self.glossary_version)
+
+    def _load(self):
+        rows = self._db.execute(
+            "SELECT source, source_lang, target_lang, glossary, translation FROM translations"
+            " WHERE glossary = ? ORDER BY used_at DESC LIMIT ?",
+            (self.glossary_version, self.max_entries),
+        ).fetchall()
+        for source, source_lang, target_lang, glossary, translation in reversed(rows):
+            self._entries[(source, source_lang, target_lang, glossary)] = translation
+        self._db.execute(
+            "DELETE FROM translations WHERE rowid NOT IN"
+            " (SELECT rowid FROM translations WHERE glossary = ? ORDER BY used_at DESC LIMIT ?)",
+            (self.glossary_version, self.max_entries),
+        )
+        self._db.commit()
+
+    def get(self, text: str, source_lang: str, target_lang: str) -> Optional[str]:
+        key = self._key(text, source_lang, target_lang)
+        with self._lock:
+            translation = self._entries.get(key)
+            if translation is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return translation
+
+    def put(self, text: str, source_lang: str, target_lang: str, translation: str):
+        if not translation:
+            return
+        key = self._key(text, source_lang, target_lang)
+        with self._lock:
+            self._entries[key] = translation
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        if self._writer:
+            self._writes.put(key + (translation, time.time()))
+
+    def _write_loop(self):
+        """
+        Write queued entries through to SQLite, one transaction per burst, until close() sends None.
+        """
+        while True:
+            rows = [self._writes.get()]
+            while not self._writes.empty():
+                rows.append(self._writes.get_nowait())
+            stop = None in rows
+            rows = [row for row in rows if row is not None]
+            if rows:
+                try:
+                    self._db.executemany(
+                        "INSERT OR REPLACE INTO translations (source, source_lang, target_lang, glossary, translation, used_at)"
+                        " VALUES (?, ?, ?, ?, ?, ?)",
+                        rows,
+                    )
+                    self._db.commit()
+                except sqlite3.Error as e:
+                    logger.error("Failed to persist %s translation(s): %s", len(rows), e)
+            if stop:
+                return
+
+    def stats(self) -> dict:
+        return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+    def close(self):
+        """
+        Persist the current recency order and close the database.
+        """
+        if not self._db:
+            return
+        self._writes.put(None)
+        self._writer.join()
+        self._writer = None
+        with self._lock:
+            now = time.time()
+            self._db.executemany(
+                "UPDATE translations SET used_at = ? WHERE source = ? AND source_lang = ? AND target_lang = ? AND glossary = ?",
+                [(now + i * 1e-6,) + key for i, key in enumerate(self._entries)],
+            )
+            self._db.commit()
+            self._db.close()
+            self._db = None
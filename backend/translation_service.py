@@ -3,21 +3,43 @@ translation.py
 Translates English text to target languages using Azure Translator API.
 """
 
+import asyncio
 import os
 import requests
+from requests.adapters import HTTPAdapter
 import uuid
-import re
-from typing import List, Callable
+from segmenter import split_sentences
+from typing import Dict, List, Callable, Optional
 from azure_auth import AzureAuth
+from translation_cache import TranslationCache
+import config
 import time
+from log import get_logger
+
+logger = get_logger(__name__)
+
+try:
+    import httpx
+except ImportError:  # optional: async client
+    httpx = None
+
+try:
+    import h2  # noqa: F401  (httpx needs it for HTTP/2)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
 
 class AzureTranslatorService:
     """
     Provides sentence segmentation and real-time translation from English to target languages using Azure Translator API.
+    Requests go over pooled keep-alive connections, so each sentence skips the TCP+TLS handshake.
     """
-    def __init__(self):
+    def __init__(self, languages: Optional[List[str]] = None, cache: Optional[TranslationCache] = None,
+                 pool_size: int = config.TRANSLATOR_POOL_SIZE):
         """
-        Initialize the translator with Azure credentials and API configuration.
+        Initialize the translator with Azure credentials and API configuration, open the pooled
+        HTTP clients and warm up a connection. All target `languages` are requested together in a
+        single Translator call; results found in `cache` skip the call entirely.
         """
         # You may want to add these to AzureAuth or a config file
         self.key = os.getenv('AZURE_TRANSLATION_KEY') # ask for key from hsg tech team 
@@ -25,10 +47,12 @@ class AzureTranslatorService:
         self.location = "centralindia"  # or your Azure region
         self.path = '/translate'
         self.url = self.endpoint + self.path
+        self.languages = list(languages or config.TARGET_LANGUAGES)
+        self.cache = cache
         self.params = {
             'api-version': '3.0',
             'from': 'en',
-            'to': ['hi']
+            'to': self.languages
         }
         self.headers = {
             'Ocp-Apim-Subscription-Key': self.key,
@@ -36,51 +60,273 @@ class AzureTranslatorService:
             'Content-type': 'application/json',
             'X-ClientTraceId': str(uuid.uuid4())
         }
-        print(f"[TRANSLATOR] Initialized with endpoint: {self.endpoint}")
+        self.timeout = (config.TRANSLATOR_CONNECT_TIMEOUT, config.TRANSLATOR_READ_TIMEOUT)
+        client_headers = {name: value for name, value in self.headers.items() if value is not None}
+
+        # Sync client: keep-alive connection pool shared by the executor threads
+        self.session = requests.Session()
+        self.session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+        self.session.headers.update(client_headers)
+
+        # Async client (optional httpx): same pooling, HTTP/2 multiplexing where h2 is installed
+        self.async_client = None
+        if httpx is not None:
+            self.async_client = httpx.AsyncClient(
+                http2=config.TRANSLATOR_HTTP2 and HTTP2_AVAILABLE,
+                headers=client_headers,
+                limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+                timeout=httpx.Timeout(config.TRANSLATOR_READ_TIMEOUT, connect=config.TRANSLATOR_CONNECT_TIMEOUT),
+            )
+        logger.info("Initialized with endpoint: %s, pool size: %s, async client: %s", self.endpoint, pool_size,
+                    'http2' if self.async_client and config.TRANSLATOR_HTTP2 and HTTP2_AVAILABLE else 'http1.1' if self.async_client else 'none')
+        self._warm_up_connection()
+
+    def _warm_up_connection(self):
+        """
+        Open a pooled connection ahead of the first sentence so it does not pay the TCP+TLS handshake.
+        Uses the free /languages endpoint on the same host, so no characters are billed.
+        """
+        try:
+            logger.debug("Warming up connection...")
+            warmup_start = time.time()
+            response = self.session.get(self.endpoint + '/languages', params={'api-version': '3.0', 'scope': 'translation'},
+                                        timeout=self.timeout)
+            logger.info("Warm-up completed in %.3fs, status: %s", time.time() - warmup_start, response.status_code)
+        except Exception as e:
+            logger.warning("Warm-up error: %s", e)
+
+    async def warm_up_async(self):
+        """
+        Warm up the async client's connection; call once from the running event loop at startup.
+        """
+        if not self.async_client:
+            return
+        try:
+            warmup_start = time.time()
+            response = await self.async_client.get(self.endpoint + '/languages', params={'api-version': '3.0', 'scope': 'translation'})
+            logger.info("Async warm-up completed in %.3fs, status: %s, %s",
+                        time.time() - warmup_start, response.status_code, response.http_version)
+        except Exception as e:
+            logger.warning("Async warm-up error: %s", e)
 
     def chunk_text(self, text: str) -> List[str]:
         """
         Split input text into sentences for chunked, real-time translation.
         """
-        # Simple sentence splitter (can be improved)
-        sentences = re.split(r'(?<=[.!?]) +', text)
-        return [s for s in sentences if s.strip()]
+        return split_sentences(text)
 
-    def translate_text(self, text: str) -> str:
+    def translate_text(self, text: str, to: Optional[str] = None) -> str:
         """
-        Translate a single sentence from English to Hindi using Azure Translator API.
+        Translate a single sentence from English to one target language (default: the first configured).
         """
-        try:
-            print(f"[TRANSLATOR] Starting translation for: '{text}'")
-            api_start = time.time()
-            
-            body = [{ 'text': text }]
-            response = requests.post(self.url, params=self.params, headers=self.headers, json=body)
-            
-            api_time = time.time() - api_start
-            print(f"[TRANSLATOR] API call took {api_time:.3f}s, status: {response.status_code}")
-            
-            if response.status_code != 200:
-                print(f"[TRANSLATOR] API error: {response.text}")
-                return ""
+        language = to or self.languages[0]
+        return self.translate_multi(text, [language]).get(language, "")
+
+    def _cached(self, text: str, languages: List[str]) -> Dict[str, str]:
+        cached = {}
+        if self.cache:
+            for lang in languages:
+                translation = self.cache.get(text, self.params['from'], lang)
+                if translation is not None:
+                    cached[lang] = translation
+        return cached
+
+    def _store(self, texts: List[str], results: List[Dict[str, str]]):
+        if self.cache:
+            for text, translations in zip(texts, results):
+                for lang, translation in translations.items():
+                    self.cache.put(text, self.params['from'], lang, translation)
+
+    def _batches(self, texts: List[str]) -> List[List[int]]:
+        """
+        Group text indexes into requests within the API's per-request element and character limits.
+        """
+        batches, current, chars = [], [], 0
+        for i, text in enumerate(texts):
+            if current and (len(current) >= config.TRANSLATOR_BATCH_MAX_ITEMS or chars + len(text) > config.TRANSLATOR_BATCH_MAX_CHARS):
+                batches.append(current)
+                current, chars = [], 0
+            current.append(i)
+            chars += len(text)
+        if current:
+            batches.append(current)
+        return batches
+
+    def _plan(self, texts: List[str], languages: List[str]):
+        """
+        Look up every text in the cache; return the partial results and the indexes still to request.
+        """
+        results = [self._cached(text, languages) for text in texts]
+        missing = [i for i, cached in enumerate(results) if len(cached) < len(languages)]
+        return results, missing
+
+    def translate_multi(self, text: str, languages: Optional[List[str]] = None) -> Dict[str, str]:
+        """
+        Translate a single sentence into every target language with one Azure Translator API call.
+        Languages already in the cache are not requested. Returns a mapping of language code to
+        translated text; languages that failed are missing.
+        """
+        return self.translate_batch([text], languages)[0]
+
+    def translate_batch(self, texts: List[str], languages: Optional[List[str]] = None) -> List[Dict[str, str]]:
+        """
+        Translate many sentences into every target language, sending up to TRANSLATOR_BATCH_MAX_ITEMS
+        text elements per API call. Cached sentences are not requested. Returns one
+        language → translation mapping per input text; failed entries are missing languages.
+        """
+        languages = list(languages or self.languages)
+        results, missing = self._plan(texts, languages)
+        if not missing:
+            logger.debug("Cache hit for %s text(s)", len(texts))
+            return results
+        params = dict(self.params, to=languages)
+        for batch in self._batches([texts[i] for i in missing]):
+            indexes = [missing[j] for j in batch]
+            try:
+                logger.debug("Starting translation of %s text(s): '%s'...", len(indexes), texts[indexes[0]])
+                api_start = time.time()
                 
-            result = response.json()
-            print(f"[TRANSLATOR] API response: {result}")
-            
-            translated_text = result[0]['translations'][0]['text']
-            total_time = time.time() - api_start
-            print(f"[TRANSLATOR] Total translation time: {total_time:.3f}s -> '{translated_text}'")
-            return translated_text
-        except Exception as e:
-            print(f"[TRANSLATOR] Exception during translation: {e}")
-            return ""
+                body = [{ 'text': texts[i] } for i in indexes]
+                response = self.session.post(self.url, params=params, json=body, timeout=self.timeout)
+                
+                api_time = time.time() - api_start
+                logger.debug("API call took %.3fs, status: %s", api_time, response.status_code)
+                
+                if response.status_code != 200:
+                    logger.error("API error: %s", response.text)
+                    continue
+                    
+                result = response.json()
+                logger.debug("API response: %s", result)
+                
+                translated = [{t['to']: t['text'] for t in item['translations']} for item in result]
+                self._store([texts[i] for i in indexes], translated)
+                for i, translations in zip(indexes, translated):
+                    results[i].update(translations)
+                total_time = time.time() - api_start
+                logger.debug("Total translation time: %.3fs for %s text(s)", total_time, len(indexes))
+            except Exception as e:
+                logger.error("Exception during translation: %s", e)
+        return results
+
+    async def translate_multi_async(self, text: str, languages: Optional[List[str]] = None) -> Dict[str, str]:
+        """
+        Async variant of translate_multi.
+        """
+        return (await self.translate_batch_async([text], languages))[0]
+
+    async def translate_batch_async(self, texts: List[str], languages: Optional[List[str]] = None) -> List[Dict[str, str]]:
+        """
+        Async variant of translate_batch over the pooled httpx client; falls back to the sync client
+        on the default executor when httpx is not installed. Cache writes run off the event loop.
+        """
+        if not self.async_client:
+            return await asyncio.to_thread(self.translate_batch, texts, languages)
+        languages = list(languages or self.languages)
+        results, missing = self._plan(texts, languages)
+        if not missing:
+            logger.debug("Cache hit for %s text(s)", len(texts))
+            return results
+        params = dict(self.params, to=languages)
+        for batch in self._batches([texts[i] for i in missing]):
+            indexes = [missing[j] for j in batch]
+            try:
+                api_start = time.time()
+                response = await self.async_client.post(self.url, params=params, json=[{ 'text': texts[i] } for i in indexes])
+                logger.debug("Async API call for %s text(s) took %.3fs, status: %s", len(indexes), time.time() - api_start, response.status_code)
+                if response.status_code != 200:
+                    logger.error("API error: %s", response.text)
+                    continue
+                translated = [{t['to']: t['text'] for t in item['translations']} for item in response.json()]
+                await asyncio.to_thread(self._store, [texts[i] for i in indexes], translated)
+                for i, translations in zip(indexes, translated):
+                    results[i].update(translations)
+            except Exception as e:
+                logger.error("Exception during async translation: %s", e)
+        return results
 
     def translate_stream(self, text_stream: List[str], on_translation: Callable[[str, str], None]):
         """
         Translate a stream of text chunks, invoking a callback for each original and translated pair.
+        Chunks are sent in batches, so archived transcripts take one API call per batch.
+        """
+        texts = [text for text in text_stream if text.strip()]
+        language = self.languages[0]
+        for start in range(0, len(texts), config.TRANSLATOR_BATCH_MAX_ITEMS):
+            batch = texts[start:start + config.TRANSLATOR_BATCH_MAX_ITEMS]
+            for text, translations in zip(batch, self.translate_batch(batch, [language])):
+                on_translation(text, translations.get(language, ""))
+
+    def close(self):
+        """
+        Close the pooled sync client (use aclose() for the async one).
         """
-        for text in text_stream:
-            if text.strip():
-                translated = self.translate_text(text)
-                on_translation(text, translated)
+        self.session.close()
+
+    async def aclose(self):
+        if self.async_client:
+            await self.async_client.aclose()
+
+
+class TranslationBatcher:
+    """
+    Micro-batcher for live translation: sentences requested within `window_ms` of each other (or
+    until `max_items` are waiting) go out in a single Translator call, and each caller gets back
+    its own result. Useful when ASR delivers several sentences at once.
+    """
+    def __init__(self, translator: AzureTranslatorService, executor=None,
+                 window_ms: float = config.TRANSLATOR_BATCH_WINDOW_MS,
+                 max_items: int = config.TRANSLATOR_BATCH_MAX_ITEMS):
+        """
+        Without a native async client, batches run on `executor` (a BlockingCallExecutor).
+        """
+        self.translator = translator
+        self.executor = executor
+        self.window = window_ms / 1000
+        self.max_items = max_items
+        self.batches_sent = 0
+        self.texts_sent = 0
+        self._pending = {}  # languages tuple -> [(text, future)]
+        self._timers = {}  # languages tuple -> TimerHandle
+
+    async def translate(self, text: str, languages: List[str]) -> Dict[str, str]:
+        """
+        Queue `text` for the next batch and wait for its translations.
+        """
+        loop = asyncio.get_running_loop()
+        key = tuple(languages)
+        future = loop.create_future()
+        pending = self._pending.setdefault(key, [])
+        pending.append((text, future))
+        if len(pending) >= self.max_items:
+            self._flush(key)
+        elif key not in self._timers:
+            self._timers[key] = loop.call_later(self.window, self._flush, key)
+        return await future
+
+    def _flush(self, key):
+        timer = self._timers.pop(key, None)
+        if timer:
+            timer.cancel()
+        batch = self._pending.pop(key, None)
+        if batch:
+            asyncio.create_task(self._send(list(key), batch))
+
+    async def _send(self, languages: List[str], batch):
+        texts = [text for text, _ in batch]
+        self.batches_sent += 1
+        self.texts_sent += len(texts)
+        try:
+            if getattr(self.translator, 'async_client', None) or self.executor is None:
+                results = await self.translator.translate_batch_async(texts, languages)
+            else:
+                results = await self.executor.run(self.translator.translate_batch, texts, languages)
+        except Exception as e:
+            logger.error("Batch of %s failed: %s", len(texts), e)
+            results = [{} for _ in texts]
+        for (_, future), translations in zip(batch, results):
+            if not future.done():
+                future.set_result(translations)
 
+    def stats(self) -> dict:
+        return {'batches': self.batches_sent, 'texts': self.texts_sent}
@@ -0,0 +1,127 @@
+"""
+tts_cache.py
+Content-addressed cache of synthesized audio: an in-memory LRU tier over a memory-mapped on-disk tier.
+"""
+
+import collections
+import hashlib
+import mmap
+import os
+import threading
+from typing import Optional
+import config
+from log import get_logger
+
+logger = get_logger(__name__)
+
+
+class AudioCache:
+    """
+    Caches TTS audio keyed by the SHA-256 of (text, voice, output format). Hits are returned as
+    read-only memoryviews, over the stored bytes or over a memory-mapped file, so cached audio
+    reaches the broadcast path without being copied. Both tiers are LRU-bounded by bytes.
+    """
+    def __init__(self, directory: Optional[str] = config.TTS_CACHE_DIR,
+                 max_memory_bytes: int = config.TTS_CACHE_MEMORY_BYTES,
+                 max_disk_bytes: int = config.TTS_CACHE_DISK_BYTES):
+        self.directory = directory
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._memory = collections.OrderedDict()  # key -> memoryview
+        self._memory_bytes = 0
+        self._disk = collections.OrderedDict()  # key -> file size, oldest first
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            files = [e for e in os.scandir(directory) if e.is_file() and e.name.endswith('.pcm')]
+            for entry in sorted(files, key=lambda e: e.stat().st_mtime):
+                self._disk[entry.name[:-4]] = entry.stat().st_size
+                self._disk_bytes += entry.stat().st_size
+        logger.info("%s entries (%s bytes) on disk in %s", len(self._disk), self._disk_bytes, directory or 'memory only')
+
+    @staticmethod
+    def key(text: str, voice: str, output_format: str, rate: float = 1.0) -> str:
+        # Normal-rate keys are unchanged, so existing cache entries stay valid
+        voice = voice if rate == 1.0 else f"{voice}@{rate:g}"
+        return hashlib.sha256(f"{voice}\0{output_format}\0{text}".encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + '.pcm')
+
+    def get(self, key: str) -> Optional[memoryview]:
+        with self._lock:
+            audio = self._memory.get(key)
+            if audio is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return audio
+            if key not in self._disk:
+                self.misses += 1
+                return None
+            try:
+                with open(self._path(key), 'rb') as f:
+                    audio = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+            except (OSError, ValueError):
+                self._disk_bytes -= self._disk.pop(key)
+                self.misses += 1
+                return None
+            self._disk.move_to_end(key)
+            self.disk_hits += 1
+            # Promote the mapping itself; the kernel page cache holds the data, no copy is made
+            self._remember(key, audio)
+            return audio
+
+    def __contains__(self, key: str) -> bool:
+        # Presence check that leaves hit/miss counts and recency untouched
+        with self._lock:
+            return key in self._memory or key in self._disk
+
+    def put(self, key: str, audio: bytes):
+        if not audio:
+            return
+        with self._lock:
+            self._remember(key, memoryview(audio).toreadonly())
+            if not self.directory or key in self._disk:
+                return
+            path = self._path(key)
+            tmp = path + '.tmp'
+            try:
+                with open(tmp, 'wb') as f:
+                    f.write(audio)
+                os.replace(tmp, path)
+            except OSError as e:
+                logger.warning("Failed to write %s: %s", path, e)
+                return
+            self._disk[key] = len(audio)
+            self._disk_bytes += len(audio)
+            while self._disk_bytes > self.max_disk_bytes and len(self._disk) > 1:
+                old, size = self._disk.popitem(last=False)
+                self._disk_bytes -= size
+                try:
+                    os.remove(self._path(old))
+                except OSError:
+                    pass
+
+    def _remember(self, key: str, audio: memoryview):
+        if key in self._memory:
+            self._memory_bytes -= len(self._memory.pop(key))
+        self._memory[key] = audio
+        self._memory_bytes += len(audio)
+        while self._memory_bytes > self.max_memory_bytes and len(self._memory) > 1:
+            _, old = self._memory.popitem(last=False)
+            self._memory_bytes -= len(old)
+
+    def stats(self) -> dict:
+        return {
+            'memory_hits': self.memory_hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'memory_entries': len(self._memory),
+            'memory_bytes': self._memory_bytes,
+            'disk_entries': len(self._disk),
+            'disk_bytes': self._disk_bytes,
+        }
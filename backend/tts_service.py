@@ -5,122 +5,445 @@ Converts translated text to audio using Azure Neural TTS with connection optimiz
 
 import azure.cognitiveservices.speech as speechsdk
 from azure_auth import AzureAuth
+from tts_cache import AudioCache
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, Optional
+import asyncio
+import collections
+import contextlib
+import config
 import io
+import queue
+import threading
 import time
+from xml.sax.saxutils import escape
+from log import get_logger
+
+logger = get_logger(__name__)
+
+OUTPUT_FORMAT = speechsdk.SpeechSynthesisOutputFormat.Raw16Khz16BitMonoPcm
+
+# Short greeting per language used to warm up each voice's connection
+WARMUP_TEXT = {
+    'hi': "नमस्ते",
+    'te': "నమస్తే",
+    'kn': "ನಮಸ್ತೆ",
+}
+
+class PooledSynthesizer:
+    """
+    A warmed SpeechSynthesizer plus the connection state the pool health checks rely on.
+    """
+    def __init__(self, language: str, synthesizer):
+        self.language = language
+        self.synthesizer = synthesizer
+        self.connection = speechsdk.Connection.from_speech_synthesizer(synthesizer)
+        self.connected = True
+        self.failed = False
+        self.last_used = time.monotonic()
+        self.connection.disconnected.connect(self._on_disconnected)
+
+    def _on_disconnected(self, evt):
+        self.connected = False
+
+
+class SynthesizerPool:
+    """
+    Pre-warmed SpeechSynthesizer instances per language, leased for one utterance at a time so
+    concurrent sentences and languages synthesize in parallel. A synthesizer that fails is dropped
+    and replaced by a background thread, so no request waits on a reconnect; a health-check thread
+    re-opens idle connections the service has closed before the next lease needs them.
+    `lease_async` waits for a free synthesizer on the event loop, so a caller can lease first and
+    only then take an executor thread for the synthesis itself.
+    A synthesizer that cannot be created is retried with exponential backoff, so transient service
+    errors do not leave the pool short for good.
+    """
+    def __init__(self, languages, create: Callable[[str], object], warm_up: Callable[[str, object], None],
+                 size: int = config.TTS_POOL_SIZE, health_interval: float = config.TTS_POOL_HEALTH_INTERVAL,
+                 retry_max: float = config.TTS_POOL_RETRY_MAX_SECONDS):
+        """
+        `create(language)` builds a synthesizer and `warm_up(language, synthesizer)` primes its connection.
+        """
+        self.size = size
+        self.health_interval = health_interval
+        self.retry_max = retry_max
+        self.replacements = 0
+        self.create_failures = 0
+        self._create = create
+        self._warm_up = warm_up
+        self._idle = {lang: queue.Queue() for lang in languages}
+        self._waiters = {lang: collections.deque() for lang in languages}  # (loop, future) of lease_async callers
+        self._waiters_lock = threading.Lock()
+        self._stop = threading.Event()
+
+        # Warm every synthesizer in parallel so startup costs one handshake, not size × languages
+        with ThreadPoolExecutor(max_workers=max(1, size * len(self._idle)), thread_name_prefix="tts-warm") as pool:
+            for lang in self._idle:
+                for _ in range(size):
+                    pool.submit(self._add_or_retry, lang)
+        self._health_thread = threading.Thread(target=self._health_loop, name="tts-pool-health", daemon=True)
+        self._health_thread.start()
+
+    def _add(self, language: str) -> bool:
+        try:
+            pooled = PooledSynthesizer(language, self._create(language))
+        except Exception as e:
+            self.create_failures += 1
+            logger.error("Could not create %s synthesizer: %s", language, e)
+            return False
+        try:
+            self._warm_up(language, pooled.synthesizer)
+        except Exception as e:
+            # Keep it anyway (as the single-synthesizer service did); the health check reconnects it
+            logger.warning("Warm-up error for %s: %s", language, e)
+            pooled.connected = False
+        self._put_idle(language, pooled)
+        return True
+
+    def _add_or_retry(self, language: str):
+        # Startup does not wait for retries; a failed slot is refilled in the background
+        if not self._add(language):
+            self._replace_async(language)
+
+    def _retry_add(self, language: str):
+        delay = 1.0
+        while not self._add(language):
+            if self._stop.wait(delay):
+                return
+            delay = min(delay * 2, self.retry_max)
+
+    def _replace_async(self, language: str):
+        self.replacements += 1
+        threading.Thread(target=self._retry_add, args=(language,), name=f"tts-replace-{language}", daemon=True).start()
+
+    def _put_idle(self, language: str, pooled: PooledSynthesizer):
+        with self._waiters_lock:
+            self._idle[language].put(pooled)
+            waiters = self._waiters[language]
+            while waiters:
+                loop, woken = waiters.popleft()
+                try:
+                    loop.call_soon_threadsafe(_wake, woken)
+                    break
+                except RuntimeError:
+                    continue  # that caller's loop is closed
+
+    def _release(self, language: str, pooled: PooledSynthesizer):
+        pooled.last_used = time.monotonic()
+        if pooled.failed:
+            self._replace_async(language)
+        else:
+            self._put_idle(language, pooled)
+
+    @contextlib.contextmanager
+    def lease(self, language: str, timeout: float = config.TTS_POOL_LEASE_TIMEOUT):
+        """
+        Borrow an idle synthesizer for `language`; set `.failed` on it to have it replaced.
+        Waits only while every pooled synthesizer of that language is busy.
+        """
+        try:
+            pooled = self._idle[language].get(timeout=timeout)
+        except queue.Empty:
+            raise RuntimeError(f"No {language} synthesizer available within {timeout}s")
+        try:
+            yield pooled
+        except BaseException:
+            pooled.failed = True
+            raise
+        finally:
+            self._release(language, pooled)
+
+    @contextlib.asynccontextmanager
+    async def lease_async(self, language: str, timeout: float = config.TTS_POOL_LEASE_TIMEOUT):
+        """
+        `lease` for event loop callers: waits for an idle synthesizer without holding a thread.
+        If the caller is cancelled while a thread may still be using it, the synthesizer is replaced.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            with self._waiters_lock:
+                try:
+                    pooled = self._idle[language].get_nowait()
+                    break
+                except queue.Empty:
+                    woken = loop.create_future()
+                    self._waiters[language].append((loop, woken))
+            remaining = deadline - loop.time()
+            try:
+                if remaining <= 0:
+                    raise RuntimeError(f"No {language} synthesizer available within {timeout}s")
+                # Re-check now and then too: a synchronous lease may have taken the one we were woken for
+                await asyncio.wait_for(woken, min(remaining, 0.25))
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                with self._waiters_lock:
+                    if (loop, woken) in self._waiters[language]:
+                        self._waiters[language].remove((loop, woken))
+        try:
+            yield pooled
+        except BaseException:
+            pooled.failed = True
+            raise
+        finally:
+            self._release(language, pooled)
+
+    def _health_loop(self):
+        while not self._stop.wait(self.health_interval):
+            for language, idle in self._idle.items():
+                for _ in range(idle.qsize()):
+                    try:
+                        pooled = idle.get_nowait()
+                    except queue.Empty:
+                        break
+                    if not pooled.connected:
+                        try:
+                            # Pre-connect in the background instead of on the next request
+                            pooled.connection.open(False)
+                            pooled.connected = True
+                        except Exception as e:
+                            logger.warning("Health check could not reconnect %s synthesizer: %s", language, e)
+                            self._replace_async(language)
+                            continue
+                    self._put_idle(language, pooled)
+
+    def stats(self) -> dict:
+        return {
+            'idle': {lang: idle.qsize() for lang, idle in self._idle.items()},
+            'size': self.size,
+            'replacements': self.replacements,
+            'create_failures': self.create_failures,
+        }
+
+    def close(self):
+        self._stop.set()
+        for idle in self._idle.values():
+            while not idle.empty():
+                idle.get_nowait()
+
+
+def _wake(future: asyncio.Future):
+    if not future.done():
+        future.set_result(None)
+
 
 class AzureTTSService:
     """
     Converts translated text to audio using Azure Neural TTS, optimizing for low-latency, persistent connections.
+    Keeps a pool of persistent, pre-warmed synthesizers per target language, each configured with that language's voice.
+    Repeated utterances are served from an optional AudioCache without resynthesizing.
+    A speaking `rate` other than 1.0 is applied through SSML prosody (used to catch up with the speaker).
+    Async callers lease a synthesizer with `lease_async` before running `text_to_speech` or
+    `stream_text_to_speech` on an executor thread, and pass it in as `pooled`.
     """
-    def __init__(self):
+    def __init__(self, voices: Optional[Dict[str, str]] = None, cache: Optional[AudioCache] = None):
         """
-        Initialize the TTS service, configure Azure credentials, and warm up the synthesizer connection.
+        Initialize the TTS service, configure Azure credentials, and warm up a pool of synthesizer connections per voice.
+        `voices` maps language code to Azure Neural voice name (default: config.TTS_VOICES).
         """
         self.auth = AzureAuth()
-        self.speech_config = self.auth.get_speech_config()
+        self.cache = cache
+        self.voices = dict(voices or config.TTS_VOICES)
+        self.default_language = next(iter(self.voices))
+        self.speech_configs = {lang: self._create_speech_config(voice) for lang, voice in self.voices.items()}
         
-        # Use the original neural voice
-        self.speech_config.speech_synthesis_voice_name = "hi-IN-MadhurNeural"
+        logger.info("Initialized with voices: %s", self.voices)
+        
+        # Create a pool of persistent synthesizer instances per language
+        self.pool = SynthesizerPool(self.voices, self._new_synthesizer, self._warm_up_connection)
+
+    def _create_speech_config(self, voice: str):
+        """
+        Build a SpeechConfig for one neural voice, with raw PCM output for streaming.
+        """
+        speech_config = self.auth.get_speech_config()
+        speech_config.speech_synthesis_voice_name = voice
         
         # Optimize for streaming and long-lived connections
-        self.speech_config.set_speech_synthesis_output_format(
-            speechsdk.SpeechSynthesisOutputFormat.Raw16Khz16BitMonoPcm
-        )
+        speech_config.set_speech_synthesis_output_format(OUTPUT_FORMAT)
+        return speech_config
+
+    def _cache_key(self, text: str, language: str, rate: float = 1.0) -> str:
+        return AudioCache.key(text, self.voices[language], OUTPUT_FORMAT.name, rate)
+
+    def _ssml(self, text: str, language: str, rate: float) -> str:
+        """
+        SSML speaking `text` with the language's voice at `rate` times the normal speed.
+        """
+        voice = self.voices[language]
+        locale = '-'.join(voice.split('-')[:2])  # e.g. hi-IN-SwaraNeural -> hi-IN
+        return (f"<speak version='1.0' xmlns='http://www.w3.org/2001/10/synthesis' xml:lang='{locale}'>"
+                f"<voice name='{voice}'><prosody rate='{rate - 1:+.0%}'>{escape(text)}</prosody></voice></speak>")
+
+    def _new_synthesizer(self, language: str):
+        # audio_config=None keeps synthesized audio in memory (result/AudioDataStream) instead of the local speaker
+        return speechsdk.SpeechSynthesizer(speech_config=self.speech_configs[language], audio_config=None)
+    
+    def _warm_up_connection(self, language: str, synthesizer):
+        """
+        Warm up one synthesizer's TTS connection to minimize cold-start latency for future synthesis requests.
+        Raises if warm-up fails, so the pool does not keep a synthesizer that cannot reach the service.
+        """
+        logger.debug("Warming up %s connection...", language)
+        warmup_start = time.time()
         
-        print(f"[TTS] Initialized with voice: {self.speech_config.speech_synthesis_voice_name}")
+        # Send a very short warm-up request
+        warmup_text = WARMUP_TEXT.get(language, "Hello")
+        result = synthesizer.speak_text_async(warmup_text).get()
         
-        # Create a persistent synthesizer instance
-        self.synthesizer = None
-        self._warm_up_connection()
-    
-    def _warm_up_connection(self):
+        warmup_time = time.time() - warmup_start
+        logger.info("Warm-up of %s completed in %.3fs", language, warmup_time)
+        
+        if not result or result.reason != speechsdk.ResultReason.SynthesizingAudioCompleted:
+            raise RuntimeError(f"Warm-up of {language} failed: {result.reason if result else 'None'}")
+        logger.debug("%s connection warmed up successfully", language)
+
+    @contextlib.asynccontextmanager
+    async def lease_async(self, text: str, language: Optional[str] = None, rate: float = 1.0):
         """
-        Establish and warm up the TTS connection to minimize cold-start latency for future synthesis requests.
+        Lease a synthesizer for `text` on the event loop; yields None when the audio is cached and none is needed.
         """
+        language = language or self.default_language
+        if self.cache and self._cache_key(text, language, rate) in self.cache:
+            yield None
+            return
+        async with self.pool.lease_async(language) as pooled:
+            yield pooled
+
+    @contextlib.contextmanager
+    def _synthesizer(self, language: str, pooled: Optional[PooledSynthesizer] = None):
+        # The caller's leased synthesizer, or one leased (and returned) here
+        if pooled is None:
+            with self.pool.lease(language) as pooled:
+                yield pooled
+            return
         try:
-            print("[TTS] Warming up connection...")
-            warmup_start = time.time()
-            
-            # Create synthesizer instance
-            self.synthesizer = speechsdk.SpeechSynthesizer(speech_config=self.speech_config)
-            
-            # Send a very short warm-up request
-            warmup_text = "नमस्ते"
-            result = self.synthesizer.speak_text_async(warmup_text).get()
-            
-            warmup_time = time.time() - warmup_start
-            print(f"[TTS] Warm-up completed in {warmup_time:.3f}s")
-            
-            if result and result.reason == speechsdk.ResultReason.SynthesizingAudioCompleted:
-                print("[TTS] Connection warmed up successfully")
-            else:
-                print(f"[TTS] Warm-up failed: {result.reason if result else 'None'}")
-                # Recreate synthesizer if warm-up failed
-                self.synthesizer = speechsdk.SpeechSynthesizer(speech_config=self.speech_config)
-                
-        except Exception as e:
-            print(f"[TTS] Warm-up error: {e}")
-            # Ensure synthesizer is created even if warm-up fails
-            self.synthesizer = speechsdk.SpeechSynthesizer(speech_config=self.speech_config)
+            yield pooled
+        except BaseException:
+            pooled.failed = True
+            raise
 
-    def text_to_speech(self, text: str) -> bytes:
+    def text_to_speech(self, text: str, language: Optional[str] = None, rate: float = 1.0,
+                       pooled: Optional[PooledSynthesizer] = None) -> bytes:
         """
-        Synthesize the given text to audio bytes using a persistent TTS connection.
+        Synthesize the given text to audio bytes with the voice of `language`, using its persistent TTS connection.
         """
+        language = language or self.default_language
+        cache_key = self._cache_key(text, language, rate) if self.cache else None
+        if cache_key:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                logger.debug("Cache hit (%s bytes) for %s text: '%s...'", len(cached), language, text[:50])
+                return cached
         try:
-            print(f"[TTS] Starting synthesis for text: '{text[:50]}...'")
+            logger.debug("Starting %s synthesis for text: '%s...'", language, text[:50])
             tts_start = time.time()
             
-            # Use the persistent synthesizer instance
-            if not self.synthesizer:
-                print("[TTS] Recreating synthesizer...")
-                self.synthesizer = speechsdk.SpeechSynthesizer(speech_config=self.speech_config)
-            
-            # Synthesize text to speech using the persistent connection
-            result = self.synthesizer.speak_text_async(text).get()
+            # Synthesize text to speech on a leased, already-connected synthesizer
+            with self._synthesizer(language, pooled) as pooled:
+                if rate == 1.0:
+                    result = pooled.synthesizer.speak_text_async(text).get()
+                else:
+                    result = pooled.synthesizer.speak_ssml_async(self._ssml(text, language, rate)).get()
+                # A failed synthesizer is replaced in the background, not on this request
+                pooled.failed = result is None or result.reason != speechsdk.ResultReason.SynthesizingAudioCompleted
             
             tts_time = time.time() - tts_start
             
             if result is None:
-                print("[TTS] Synthesis returned None")
+                logger.warning("Synthesis returned None")
                 return b""
 
-            print(f"[TTS] Synthesis completed in {tts_time:.3f}s, result reason: {result.reason}")
+            logger.debug("Synthesis completed in %.3fs, result reason: %s", tts_time, result.reason)
             
             if result.reason == speechsdk.ResultReason.SynthesizingAudioCompleted:
                 # Get audio data
                 audio_data = result.audio_data
                 total_time = time.time() - tts_start
-                print(f"[TTS] Successfully generated {len(audio_data)} bytes in {total_time:.3f}s")
+                logger.debug("Successfully generated %s bytes in %.3fs", len(audio_data), total_time)
+                if cache_key:
+                    self.cache.put(cache_key, audio_data)
                 return audio_data
             else:
-                print(f"[TTS] Synthesis failed: {result.reason}")
+                logger.error("Synthesis failed: %s", result.reason)
                 if hasattr(result, 'error_details'):
-                    print(f"[TTS] Error details: {result.error_details}")
-                
-                # If synthesis failed, try recreating the synthesizer
-                print("[TTS] Attempting to recreate synthesizer...")
-                self.synthesizer = speechsdk.SpeechSynthesizer(speech_config=self.speech_config)
+                    logger.error("Error details: %s", result.error_details)
                 return b""
         except Exception as e:
-            print(f"[TTS] Exception during synthesis: {e}")
-            # Recreate synthesizer on exception
-            self.synthesizer = speechsdk.SpeechSynthesizer(speech_config=self.speech_config)
+            logger.error("Exception during synthesis: %s", e)
             return b""
 
-    def synthesize_to_stream(self, text: str, audio_stream):
+    def stream_text_to_speech(self, text: str, language: Optional[str] = None,
+                              chunk_size: int = config.TTS_STREAM_CHUNK_BYTES, rate: float = 1.0,
+                              pooled: Optional[PooledSynthesizer] = None) -> Iterator[bytes]:
+        """
+        Synthesize the given text and yield PCM chunks as the service produces them, so playback
+        can start after the first chunk instead of after the whole sentence. Blocks between chunks;
+        run it off the event loop. Cached audio is yielded as zero-copy slices of the cached buffer.
+        """
+        language = language or self.default_language
+        cache_key = self._cache_key(text, language, rate) if self.cache else None
+        if cache_key:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                logger.debug("Cache hit (%s bytes) for %s text: '%s...'", len(cached), language, text[:50])
+                for start in range(0, len(cached), chunk_size):
+                    yield cached[start:start + chunk_size]
+                return
+        try:
+            logger.debug("Starting streaming %s synthesis for text: '%s...'", language, text[:50])
+            tts_start = time.time()
+
+            with self._synthesizer(language, pooled) as pooled:
+                # Returns as soon as the first audio arrives; the rest is pulled from the data stream
+                if rate == 1.0:
+                    result = pooled.synthesizer.start_speaking_text_async(text).get()
+                else:
+                    result = pooled.synthesizer.start_speaking_ssml_async(self._ssml(text, language, rate)).get()
+                if result is None or result.reason != speechsdk.ResultReason.SynthesizingAudioStarted:
+                    logger.error("Streaming synthesis failed to start: %s", result.reason if result else 'None')
+                    pooled.failed = True
+                    return
+
+                stream = speechsdk.AudioDataStream(result)
+                buffer = bytes(chunk_size)
+                chunks = []
+                total = 0
+                while True:
+                    filled = stream.read_data(buffer)
+                    if filled == 0:
+                        break
+                    if total == 0:
+                        logger.debug("First %s chunk after %.3fs", language, time.time() - tts_start)
+                    total += filled
+                    chunk = buffer[:filled]
+                    if cache_key:
+                        chunks.append(chunk)
+                    yield chunk
+
+                if stream.status == speechsdk.StreamStatus.Canceled:
+                    details = stream.cancellation_details
+                    logger.error("Streaming synthesis canceled: %s %s", details.reason, details.error_details)
+                    pooled.failed = True
+                else:
+                    logger.debug("Streamed %s bytes in %.3fs", total, time.time() - tts_start)
+                    if cache_key:
+                        self.cache.put(cache_key, b"".join(chunks))
+        except Exception as e:
+            logger.error("Exception during streaming synthesis: %s", e)
+
+    def synthesize_to_stream(self, text: str, audio_stream, language: Optional[str] = None):
         """
         Synthesize text to audio and write the result to a provided stream object.
         """
-        audio_data = self.text_to_speech(text)
+        audio_data = self.text_to_speech(text, language)
         if audio_data:
             audio_stream.write(audio_data)
     
     def close(self):
         """
-        Release the TTS synthesizer connection and clean up resources.
+        Release the TTS synthesizer connections and clean up resources.
         """
-        if self.synthesizer:
-            self.synthesizer = None
-            print("[TTS] Connection closed")
-
+        self.pool.close()
+        logger.info("Connections closed")
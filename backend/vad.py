@@ -0,0 +1,84 @@
+"""
+vad.py
+Voice activity detection on the ingest stream (16 kHz 16-bit mono PCM): detects pauses so the
+pending text can be flushed early, and drops long silences before they reach (billed) ASR.
+"""
+
+from collections import deque
+from typing import Tuple
+import webrtcvad
+import config
+
+SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2
+
+
+class SilenceDetector:
+    """
+    Classifies incoming PCM in `frame_ms` frames with webrtcvad.
+    - Silence is forwarded for `hangover_ms` after speech, so ASR still sees the pause it needs
+      to finalize the utterance; beyond that it is skipped.
+    - The last `preroll_ms` of skipped silence is forwarded when speech resumes, so onsets are not clipped.
+    - A pause is reported once per silent stretch when it reaches `pause_ms`.
+    """
+    def __init__(self, aggressiveness: int = config.VAD_AGGRESSIVENESS, frame_ms: int = config.VAD_FRAME_MS,
+                 pause_ms: int = config.VAD_PAUSE_MS, hangover_ms: int = config.VAD_HANGOVER_MS,
+                 preroll_ms: int = config.VAD_PREROLL_MS):
+        if frame_ms not in (10, 20, 30):
+            raise ValueError("webrtcvad frames must be 10, 20 or 30 ms")
+        self._vad = webrtcvad.Vad(aggressiveness)
+        self.frame_ms = frame_ms
+        self.frame_bytes = SAMPLE_RATE * SAMPLE_WIDTH * frame_ms // 1000
+        self.pause_ms = pause_ms
+        self.hangover_ms = hangover_ms
+        self._preroll = deque(maxlen=max(preroll_ms // frame_ms, 0))
+        self._pending = b""
+        self._silent_ms = 0
+        self._heard_speech = False
+        self.forwarded_ms = 0
+        self.skipped_ms = 0
+        self.pauses = 0
+
+    def process(self, chunk: bytes) -> Tuple[bytes, bool]:
+        """
+        Returns (audio to forward to ASR, whether a pause was detected in this chunk).
+        """
+        data = self._pending + chunk
+        usable = len(data) - len(data) % self.frame_bytes
+        self._pending = data[usable:]
+        forward = []
+        paused = False
+        for offset in range(0, usable, self.frame_bytes):
+            frame = data[offset:offset + self.frame_bytes]
+            if self._vad.is_speech(frame, SAMPLE_RATE):
+                if self._preroll:
+                    forward.extend(self._preroll)
+                    self.forwarded_ms += len(self._preroll) * self.frame_ms
+                    self.skipped_ms -= len(self._preroll) * self.frame_ms
+                    self._preroll.clear()
+                self._silent_ms = 0
+                self._heard_speech = True
+            else:
+                self._silent_ms += self.frame_ms
+                if self._heard_speech and self._silent_ms >= self.pause_ms:
+                    self._heard_speech = False
+                    paused = True
+                    self.pauses += 1
+                if self._silent_ms > self.hangover_ms:
+                    self._preroll.append(frame)
+                    self.skipped_ms += self.frame_ms
+                    continue
+            forward.append(frame)
+            self.forwarded_ms += self.frame_ms
+        return b"".join(forward), paused
+
+    @property
+    def speaking(self) -> bool:
+        """
+        Whether the most recent frame contained speech.
+        """
+        return self._silent_ms == 0 and self.forwarded_ms > 0
+
+    def stats(self) -> dict:
+        return {"forwarded_seconds": round(self.forwarded_ms / 1000, 1),
+                "skipped_seconds": round(self.skipped_ms / 1000, 1), "pauses": self.pauses}
@@ -0,0 +1,53 @@
+"""
+Micro-benchmark for BroadcastManager fan-out cost at 10/100/1000 listeners.
+Runs offline (no Azure, no server): python test/bench_broadcast_fanout.py
+"""
+import asyncio
+import os
+import sys
+import time
+
+# Keep every chunk queued so the benchmark measures fan-out, not the overflow policy
+os.environ.setdefault("HSG_LISTENER_QUEUE_MAX_BYTES", str(1 << 40))
+os.environ.setdefault("HSG_LISTENER_MAX_LAG_SECONDS", "1e9")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+from broadcast_manager import BroadcastManager
+
+LISTENER_COUNTS = [10, 100, 1000]
+CHUNKS = 200
+CHUNK = bytes(3200)  # 100 ms of 16 kHz 16-bit mono PCM
+LANGUAGE = "hi"
+
+
+async def bench(listeners: int):
+    manager = BroadcastManager()
+    sockets = [object() for _ in range(listeners)]
+
+    start = time.perf_counter()
+    for ws in sockets:
+        await manager.register(ws, LANGUAGE)
+    register_us = (time.perf_counter() - start) / listeners * 1e6
+
+    start = time.perf_counter()
+    for seq in range(CHUNKS):
+        await manager.broadcast_audio(CHUNK, LANGUAGE, seq)
+    broadcast_us = (time.perf_counter() - start) / CHUNKS * 1e6
+
+    start = time.perf_counter()
+    for ws in sockets:
+        await manager.unregister(ws, LANGUAGE)
+    unregister_us = (time.perf_counter() - start) / listeners * 1e6
+
+    print(f"{listeners:>6} listeners: broadcast {broadcast_us:9.1f} us/chunk "
+          f"({broadcast_us / listeners * 1000:6.0f} ns/listener), "
+          f"register {register_us:5.2f} us, unregister {unregister_us:5.2f} us")
+
+
+async def main():
+    for listeners in LISTENER_COUNTS:
+        await bench(listeners)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,190 @@
+"""
+Offline load test: runs the real server (routes, pipeline, broadcast) on local stand-ins for
+Azure ASR/Translator/TTS, drives N synthetic speakers and M listeners (spread over R rooms) over
+the WebSocket endpoints, and reports end-to-end latency percentiles, listener lag and memory.
+
+    python test/bench_load.py --rooms 2 --speakers 2 --listeners 300 --duration 60 --tts-latency 0.4
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import sys
+import threading
+import time
+import urllib.request
+
+# No disk caches or log writer thread for the benchmark; the fakes are not cached anyway
+os.environ.setdefault("HSG_TRANSLATION_CACHE_PATH", "")
+os.environ.setdefault("HSG_TTS_CACHE_DIR", "")
+os.environ.setdefault("HSG_SUBTITLE_ARCHIVE_DIR", "")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import uvicorn
+import websockets
+
+import config
+from server import create_app
+from pacer import HEADER
+from fake_services import BYTES_PER_SECOND, FakeASRService, FakeTranslatorService, FakeTTSService, Latency
+
+CHUNK_SECONDS = 0.02
+
+
+def speech_audio(seconds: float) -> bytes:
+    """
+    Amplitude-modulated tone plus noise: classified as speech by the VAD.
+    """
+    t = np.arange(int(seconds * 16000)) / 16000
+    signal = np.sin(2 * np.pi * 220 * t) * 8000 * (1 + np.sin(2 * np.pi * 3 * t)) / 2 + np.random.randn(len(t)) * 2000
+    return signal.astype("<i2").tobytes()
+
+
+async def speaker(url: str, duration: float, talk_seconds: float, pause_seconds: float):
+    """
+    Stream `duration` seconds of real-time audio: talk_seconds of speech, then pause_seconds of silence.
+    """
+    speech = speech_audio(talk_seconds)
+    silence = bytes(int(pause_seconds * BYTES_PER_SECOND) & ~1)
+    chunk = int(CHUNK_SECONDS * BYTES_PER_SECOND)
+    async with websockets.connect(url, max_size=None) as ws:
+        start = time.monotonic()
+        sent = 0
+        cycle = speech + silence
+        while sent * CHUNK_SECONDS < duration:
+            offset = sent * chunk % len(cycle)
+            await ws.send(cycle[offset:offset + chunk])
+            sent += 1
+            await asyncio.sleep(max(0.0, start + sent * CHUNK_SECONDS - time.monotonic()))
+
+
+async def listener(url: str, stats: dict, stop: asyncio.Event):
+    async with websockets.connect(url, max_size=None) as ws:
+        while not stop.is_set():
+            try:
+                data = await asyncio.wait_for(ws.recv(), timeout=0.5)
+            except asyncio.TimeoutError:
+                continue
+            _, _, _, sent_at = HEADER.unpack_from(data)
+            stats["delays"].append(time.time() - sent_at)
+            stats["bytes"] += len(data) - HEADER.size
+            stats["messages"] += 1
+
+
+def all_listeners(metrics: dict) -> list:
+    return [listener for room in metrics["rooms"].values()
+            for listeners in room["listeners"].values() for listener in listeners]
+
+
+def fetch_metrics(port: int) -> dict:
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics") as response:
+        return json.load(response)
+
+
+def rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux: peak resident set size of this (server + clients) process
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def sample_lag(port: int, samples: list, stop: asyncio.Event):
+    while not stop.is_set():
+        metrics = await asyncio.to_thread(fetch_metrics, port)
+        lags = [listener["lag_seconds"] for listener in all_listeners(metrics)]
+        if lags:
+            samples.append(max(lags))
+        await asyncio.sleep(1.0)
+
+
+async def run(args, port: int):
+    base = f"ws://127.0.0.1:{port}"
+    languages = config.TARGET_LANGUAGES
+    stop = asyncio.Event()
+    listener_stats = [{"bytes": 0, "messages": 0, "delays": []} for _ in range(args.listeners)]
+    listeners = [asyncio.create_task(listener(f"{base}/ws/audio-out/room-{i % args.rooms}/{languages[i % len(languages)]}?paced=1",
+                                              stats, stop))
+                 for i, stats in enumerate(listener_stats)]
+    lag_samples = []
+    sampler = asyncio.create_task(sample_lag(port, lag_samples, stop))
+    await asyncio.sleep(0.5)
+
+    await asyncio.gather(*(speaker(f"{base}/ws/audio-in/room-{i % args.rooms}", args.duration, args.talk_seconds,
+                                   args.pause_seconds)
+                           for i in range(args.speakers)))
+    await asyncio.sleep(args.drain_seconds)
+    stop.set()
+    await asyncio.gather(*listeners, sampler, return_exceptions=True)
+    return listener_stats, lag_samples, await asyncio.to_thread(fetch_metrics, port)
+
+
+def report(args, listener_stats, lag_samples, metrics, rss_before):
+    print(f"{args.rooms} room(s), {args.speakers} speaker(s), {args.listeners} listener(s), {args.duration:.0f}s, "
+          f"failure rate {args.failure_rate:.1%}")
+    for room_id, room in sorted(metrics["rooms"].items()):
+        print(f"\nLatency per stage in {room_id} (ms):")
+        for stage, stats in room["latency"].items():
+            print(f"  {stage:<20} since {stats['since']:<20} n={stats['count']:<6} "
+                  f"p50 {stats['p50_ms']:>8.1f}  p95 {stats['p95_ms']:>8.1f}  p99 {stats['p99_ms']:>8.1f}")
+        control = room.get("latency_control")
+        if control:
+            print(f"  latency control: lag {control['lag_seconds']}, rate {control['rate']}, "
+                  f"sped up {control['sped_up']}, merged {control['merged']}, dropped {control['dropped']}")
+    received = sorted(stats["bytes"] / BYTES_PER_SECOND for stats in listener_stats) or [0.0]
+    print(f"\nAudio received per listener: min {received[0]:.1f}s, median {received[len(received) // 2]:.1f}s, "
+          f"max {received[-1]:.1f}s")
+    delays = sorted(delay for stats in listener_stats for delay in stats["delays"]) or [0.0]
+    print(f"Packet delivery delay (server send to client receive): p50 {delays[len(delays) // 2] * 1000:.1f} ms, "
+          f"p99 {delays[int(len(delays) * 0.99)] * 1000:.1f} ms over {len(delays)} packets")
+    dropped = sum(listener["dropped_chunks"] for listener in all_listeners(metrics))
+    print(f"Worst listener lag: max {max(lag_samples, default=0.0):.2f}s over {len(lag_samples)} samples; "
+          f"dropped chunks at end: {dropped}")
+    print(f"Peak RSS: {rss_mb():.0f} MB (before run {rss_before:.0f} MB)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rooms", type=int, default=1, help="speakers and listeners are spread over the rooms")
+    parser.add_argument("--speakers", type=int, default=1)
+    parser.add_argument("--listeners", type=int, default=100)
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of speech per speaker")
+    parser.add_argument("--talk-seconds", type=float, default=6.0)
+    parser.add_argument("--pause-seconds", type=float, default=1.0)
+    parser.add_argument("--drain-seconds", type=float, default=5.0, help="wait for the pipeline after speakers stop")
+    parser.add_argument("--utterance-seconds", type=float, default=3.0, help="audio per fake ASR recognition")
+    parser.add_argument("--asr-latency", type=float, default=0.3, help="median seconds")
+    parser.add_argument("--translate-latency", type=float, default=0.15, help="median seconds")
+    parser.add_argument("--tts-latency", type=float, default=0.4, help="median seconds to first audio")
+    parser.add_argument("--spread", type=float, default=0.3, help="log-normal sigma of every latency")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="per call, for every fake service")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    app = create_app(
+        asr_service=FakeASRService(Latency(args.asr_latency, args.spread), args.utterance_seconds, args.failure_rate),
+        translator_service=FakeTranslatorService(config.TARGET_LANGUAGES, Latency(args.translate_latency, args.spread),
+                                                 args.failure_rate),
+        tts_service=FakeTTSService(Latency(args.tts_latency, args.spread), args.failure_rate),
+    )
+    # The server gets its own thread and event loop so client load does not distort its timings
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=args.port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+
+    rss_before = rss_mb()
+    try:
+        listener_stats, lag_samples, metrics = asyncio.run(run(args, args.port))
+        report(args, listener_stats, lag_samples, metrics, rss_before)
+    finally:
+        server.should_exit = True
+        thread.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,15 @@
+"""
+Unit tests import the backend modules the way backend/main.py does (flat, from backend/),
+without disk caches or the background log writer.
+"""
+import os
+import sys
+
+os.environ.setdefault("HSG_TRANSLATION_CACHE_PATH", "")
+os.environ.setdefault("HSG_TTS_CACHE_DIR", "")
+os.environ.setdefault("HSG_SUBTITLE_ARCHIVE_DIR", "")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Manual end-to-end client: needs a running server and an audio device
+collect_ignore = ["test_e2e_translation.py"]
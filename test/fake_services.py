@@ -0,0 +1,212 @@
+"""
+Local stand-ins for the Azure ASR, Translator and TTS services, with configurable latency
+distributions and failure rates. They implement the interfaces the Orchestrator and the
+/ws/audio-in route use, so a server can run offline (see test/bench_load.py).
+The Echo*/InlineExecutor/FixedController stand-ins at the end are instant and deterministic,
+for unit tests of the pipeline and speculation.
+"""
+import itertools
+import math
+import random
+import threading
+import time
+
+SAMPLE_RATE = 16000
+BYTES_PER_SECOND = SAMPLE_RATE * 2
+
+SENTENCES = [
+    "Good morning church and welcome to our service today.",
+    "Please turn with me to the Gospel of John chapter three.",
+    "For God so loved the world that he gave his only Son.",
+    "This is the heart of the message we share every week.",
+    "Let us pause for a moment and reflect on these words.",
+    "Grace is not something we earn but something we receive.",
+    "When we gather together we are reminded of his faithfulness.",
+    "Let us stand and pray together before we continue.",
+]
+
+
+class Latency:
+    """
+    Log-normal latency: `median` seconds, `spread` the sigma of the underlying normal (0 = constant).
+    """
+    def __init__(self, median: float, spread: float = 0.3):
+        self.median = median
+        self.spread = spread
+
+    def sample(self) -> float:
+        if self.median <= 0:
+            return 0.0
+        return random.lognormvariate(math.log(self.median), self.spread) if self.spread else self.median
+
+
+class FakeServiceError(RuntimeError):
+    pass
+
+
+def _maybe_fail(failure_rate: float, what: str):
+    if failure_rate and random.random() < failure_rate:
+        raise FakeServiceError(f"injected {what} failure")
+
+
+class FakePushStream:
+    """
+    Counts pushed audio and emits one final recognition (on a timer thread, like the Speech SDK)
+    per `utterance_seconds` of audio.
+    """
+    def __init__(self, asr, on_recognized):
+        self._asr = asr
+        self._on_recognized = on_recognized
+        self._pending_bytes = 0
+        self._utterance_bytes = int(asr.utterance_seconds * BYTES_PER_SECOND)
+        self.closed = False
+
+    def write(self, data: bytes):
+        if self.closed:
+            return
+        self._pending_bytes += len(data)
+        while self._pending_bytes >= self._utterance_bytes:
+            self._pending_bytes -= self._utterance_bytes
+            if self._asr.failure_rate and random.random() < self._asr.failure_rate:
+                continue  # no match, like a mumbled phrase
+            timer = threading.Timer(self._asr.latency.sample(), self._on_recognized, args=(next(self._asr.texts),))
+            timer.daemon = True
+            timer.start()
+
+    def close(self):
+        self.closed = True
+
+
+class FakeRecognizer:
+    def start_continuous_recognition(self):
+        pass
+
+    def stop_continuous_recognition(self):
+        pass
+
+
+class FakeASRService:
+    """
+    Stand-in for AzureASRService: a recognition every `utterance_seconds` of audio, delivered
+    `latency` later; `failure_rate` of utterances are not recognized.
+    """
+    def __init__(self, latency: Latency, utterance_seconds: float = 3.0, failure_rate: float = 0.0):
+        self.latency = latency
+        self.utterance_seconds = utterance_seconds
+        self.failure_rate = failure_rate
+        self.texts = itertools.cycle(SENTENCES)
+
+    def create_streaming_recognizer(self, on_recognized, on_recognizing=None):
+        # No partial results: speculation has nothing to work on against this stand-in
+        return FakePushStream(self, on_recognized), FakeRecognizer()
+
+
+class FakeTranslatorService:
+    """
+    Stand-in for AzureTranslatorService: one `latency` per request (a batch counts as one).
+    """
+    def __init__(self, languages, latency: Latency, failure_rate: float = 0.0):
+        self.languages = list(languages)
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.requests = 0
+
+    def translate_batch(self, texts, languages=None):
+        self.requests += 1
+        time.sleep(self.latency.sample())
+        _maybe_fail(self.failure_rate, "translation")
+        return [{lang: f"[{lang}] {text}" for lang in (languages or self.languages)} for text in texts]
+
+    def translate_multi(self, text, languages=None):
+        return self.translate_batch([text], languages)[0]
+
+
+class FakeTTSService:
+    """
+    Stand-in for AzureTTSService: `chars_per_second` (times the speaking rate) of PCM speech per
+    text, with the first chunk after `latency` and the rest produced `realtime_factor` times faster than real time.
+    """
+    def __init__(self, latency: Latency, failure_rate: float = 0.0, chars_per_second: float = 14.0,
+                 realtime_factor: float = 10.0):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.chars_per_second = chars_per_second
+        self.realtime_factor = realtime_factor
+
+    def _audio(self, text: str, rate: float = 1.0) -> bytes:
+        return bytes(int(len(text) / self.chars_per_second / rate * BYTES_PER_SECOND) & ~1)
+
+    def text_to_speech(self, text, language=None, rate=1.0, pooled=None):
+        audio = self._audio(text, rate)
+        time.sleep(self.latency.sample() + len(audio) / BYTES_PER_SECOND / self.realtime_factor)
+        _maybe_fail(self.failure_rate, "TTS")
+        return audio
+
+    def stream_text_to_speech(self, text, language=None, chunk_size=3200, rate=1.0, pooled=None):
+        audio = self._audio(text, rate)
+        time.sleep(self.latency.sample())
+        _maybe_fail(self.failure_rate, "TTS")
+        for start in range(0, len(audio), chunk_size):
+            chunk = audio[start:start + chunk_size]
+            time.sleep(len(chunk) / BYTES_PER_SECOND / self.realtime_factor)
+            yield chunk
+
+
+class EchoTranslatorService:
+    """
+    Instant translator: "<lang>:<text>" for every language; `calls` records each text.
+    """
+    def __init__(self):
+        self.calls = []
+
+    def translate_multi(self, text, languages):
+        self.calls.append(text)
+        return {lang: f"{lang}:{text}" for lang in languages}
+
+
+class EchoTTSService:
+    """
+    Instant TTS whose audio is the UTF-8 text itself; `calls` records each (text, rate).
+    """
+    def __init__(self):
+        self.calls = []
+
+    def text_to_speech(self, text, language=None, rate=1.0, pooled=None):
+        self.calls.append((text, rate))
+        return text.encode()
+
+
+class InlineExecutor:
+    """
+    Runs blocking calls directly on the loop. When `gate` (an asyncio.Event) is given, TTS calls
+    wait for it first, so a test can hold sentences in the TTS queue.
+    """
+    def __init__(self, gate=None):
+        self.gate = gate
+
+    async def run(self, func, *args, **kwargs):
+        if self.gate and func.__name__ == "text_to_speech":
+            await self.gate.wait()
+        return func(*args, **kwargs)
+
+
+class FixedController:
+    """
+    LatencyController stand-in with a fixed speaking rate (None drops) and merge decision;
+    `decided` and `merges` record what the pipeline asked.
+    """
+    def __init__(self, rate=1.0, merge=False):
+        self.rate = rate
+        self.merge = merge
+        self.decided = []
+        self.merges = []
+
+    def decide(self, language, seqs):
+        self.decided.append((language, list(seqs)))
+        return self.rate
+
+    def should_merge(self, language, queued_text, text):
+        return self.merge
+
+    def merged(self, language, seqs):
+        self.merges.append((language, list(seqs)))
@@ -0,0 +1,119 @@
+import asyncio
+
+import pytest
+
+from broadcast_manager import (AudioHistory, DISCONNECT, DROP_OLDEST, DROP_TO_LATEST_SENTENCE,
+                               ListenerDisconnected, ListenerQueue, START_LIVE, START_REWIND, START_SENTENCE)
+
+
+def drain(queue):
+    items = []
+    while len(queue):
+        items.append(asyncio.run(queue.get()))
+    return items
+
+
+def test_unknown_policy_rejected():
+    with pytest.raises(ValueError):
+        ListenerQueue(policy="drop_newest")
+
+
+def test_drop_oldest_keeps_newest_chunks_within_byte_limit():
+    queue = ListenerQueue(policy=DROP_OLDEST, max_bytes=10, max_lag_seconds=60)
+    for i, chunk in enumerate([b"aaaa", b"bbbb", b"cccc", b"dddd"]):
+        queue.put_nowait(chunk, seq=i)
+    assert queue.queued_bytes <= 10
+    assert queue.dropped_chunks == 2 and queue.dropped_bytes == 8
+    assert drain(queue) == [b"cccc", b"dddd"]
+
+
+def test_drop_to_latest_sentence_skips_to_start_of_newest_sentence():
+    queue = ListenerQueue(policy=DROP_TO_LATEST_SENTENCE, max_bytes=12, max_lag_seconds=60)
+    for chunk, seq in [(b"a1a1", 0), (b"a2a2", 0), (b"b1b1", 1), (b"c1", 2)]:
+        queue.put_nowait(chunk, seq=seq)
+    assert drain(queue) == [b"c1"]
+    assert queue.dropped_chunks == 3
+
+
+def test_drop_to_latest_sentence_trims_one_oversized_sentence():
+    queue = ListenerQueue(policy=DROP_TO_LATEST_SENTENCE, max_bytes=8, max_lag_seconds=60)
+    for chunk in [b"aaaa", b"bbbb", b"cccc"]:
+        queue.put_nowait(chunk, seq=0)
+    assert drain(queue) == [b"bbbb", b"cccc"]
+
+
+def test_disconnect_policy_empties_queue_and_raises():
+    queue = ListenerQueue(policy=DISCONNECT, max_bytes=6, max_lag_seconds=60)
+    queue.put_nowait(b"aaaa", seq=0)
+    queue.put_nowait(b"bbbb", seq=1)
+    assert queue.closed_reason and len(queue) == 0
+    queue.put_nowait(b"cccc", seq=2)  # ignored once closed
+    assert len(queue) == 0
+    with pytest.raises(ListenerDisconnected):
+        asyncio.run(queue.get())
+    assert queue.stats()["disconnected"]
+
+
+def test_lag_limit_triggers_policy(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("broadcast_manager.time.monotonic", lambda: now[0])
+    queue = ListenerQueue(policy=DROP_OLDEST, max_bytes=1000, max_lag_seconds=2)
+    queue.put_nowait(b"old", seq=0)
+    now[0] += 5
+    queue.put_nowait(b"new", seq=1)
+    assert drain(queue) == [b"new"]
+
+
+def test_close_wakes_pending_get():
+    async def scenario():
+        queue = ListenerQueue(policy=DROP_OLDEST)
+        getter = asyncio.create_task(queue.get())
+        await asyncio.sleep(0)
+        queue.close("client disconnected")
+        with pytest.raises(ListenerDisconnected):
+            await getter
+
+    asyncio.run(scenario())
+
+
+def test_replay_raises_limits_until_replayed_frames_leave(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("broadcast_manager.time.monotonic", lambda: now[0])
+    queue = ListenerQueue(policy=DROP_OLDEST, max_bytes=8, max_lag_seconds=1)
+    queue.replay([(b"aaaa", 0, 1.0), (b"bbbb", 0, 1.0), (b"cccc", 1, 1.0)])
+    queue.put_nowait(b"dddd", seq=2)
+    now[0] += 3.5
+    queue.put_nowait(b"eeee", seq=2)
+    assert queue.dropped_chunks == 0
+    assert asyncio.run(queue.get()) == b"aaaa" and queue.last_replayed
+
+    # Each replayed frame that leaves takes its allowance with it; the base limits are unchanged
+    assert queue.max_bytes == 8 and queue.max_lag_seconds == 1
+    queue.put_nowait(b"ffff", seq=2)
+    assert queue.dropped_chunks == 3
+    assert [(asyncio.run(queue.get()), queue.last_replayed) for _ in range(len(queue))] == [
+        (b"eeee", False), (b"ffff", False)]
+
+
+def test_history_replays_latest_sentence_or_rewinds_whole_sentences():
+    history = AudioHistory(max_seconds=60, max_bytes=1000, max_age=60)
+    for seq in range(3):
+        history.append(b"x%d" % seq, seq, 2.0)
+    assert history.replay(START_LIVE) == ([], 0.0)
+    assert history.replay(START_SENTENCE) == ([(b"x2", 2, 2.0)], 2.0)
+    frames, seconds = history.replay(START_REWIND, 3.0)
+    assert [seq for _, seq, _ in frames] == [1, 2] and seconds == 4.0
+
+
+def test_history_does_not_replay_sentences_older_than_max_age(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("broadcast_manager.time.monotonic", lambda: now[0])
+    history = AudioHistory(max_seconds=60, max_bytes=1000, max_age=30)
+    history.append(b"old", 0, 2.0)
+    now[0] += 20
+    history.append(b"new", 1, 2.0)
+    now[0] += 15
+    assert history.replay(START_REWIND, 10.0) == ([(b"new", 1, 2.0)], 2.0)
+    now[0] += 30
+    assert history.replay(START_SENTENCE) == ([], 0.0)
+    assert history.stats()["sentences"] == 0
@@ -1,12 +1,12 @@
 import asyncio
 import websockets
 import sounddevice as sd
-import numpy as np
 import wave
 import io
+import struct
 
 INPUT_WS_URL = "ws://localhost:8000/ws/audio-in"
-OUTPUT_WS_URL = "ws://localhost:8000/ws/audio-out"
+OUTPUT_WS_URL = "ws://localhost:8000/ws/audio-out?paced=1"
 AUDIO_FILE = "test/test_audio_5m.wav"
 CHUNK_SIZE = 4096  # Adjust as needed
 
@@ -17,6 +17,10 @@ SAMPLE_WIDTH = 2  # 16 bits (2 bytes per sample)
 
 IDLE_TIMEOUT = 15  # seconds
 
+# Header of each paced audio-out packet (backend/pacer.py): packet number, sentence seq,
+# media timestamp (us), server send time (Unix seconds)
+PACKET_HEADER = struct.Struct("!IiQd")
+
 async def stream_audio_file(input_ws_url, audio_path):
     async with websockets.connect(input_ws_url, max_size=None) as ws:
         with open(audio_path, "rb") as f:
@@ -35,6 +39,9 @@ async def receive_audio_output(output_ws_url, wav_save_path="output_audio.wav"):
     wav_file.setsampwidth(SAMPLE_WIDTH)
     wav_file.setframerate(SAMPLE_RATE)
     print(f"Connected to output stream. Saving and playing output to: {wav_save_path}")
+    # Paced packets arrive at playback rate, so they are written back to back to one output stream
+    player = sd.RawOutputStream(samplerate=SAMPLE_RATE, channels=CHANNELS, dtype="int16")
+    player.start()
     async with websockets.connect(output_ws_url, max_size=None) as ws:
         try:
             while True:
@@ -44,15 +51,18 @@ async def receive_audio_output(output_ws_url, wav_save_path="output_audio.wav"):
                     print(f"No audio received for {IDLE_TIMEOUT} seconds. Assuming end of stream.")
                     break
                 if isinstance(audio_chunk, bytes):
+                    packet, sentence, media_us, sent_at = PACKET_HEADER.unpack_from(audio_chunk)
+                    audio_chunk = audio_chunk[PACKET_HEADER.size:]
                     # Play live audio (PCM 16-bit)
-                    np_audio = np.frombuffer(audio_chunk, dtype=np.int16)
-                    sd.play(np_audio, samplerate=SAMPLE_RATE, blocking=False)
+                    player.write(audio_chunk)
                     # Save to WAV file
                     wav_file.writeframes(audio_chunk)
-                    print(f"Received and played audio chunk of {len(audio_chunk)} bytes")
+                    print(f"Packet {packet} of sentence {sentence} at {media_us / 1e6:.2f}s: {len(audio_chunk)} bytes")
         except websockets.exceptions.ConnectionClosed:
             print("Output websocket closed.")
         finally:
+            player.stop()
+            player.close()
             wav_file.close()
             print("WAV file closed.")
 
@@ -0,0 +1,58 @@
+import pytest
+
+from latency_controller import LatencyController
+
+
+def controller(lags):
+    return LatencyController(["hi"], lambda language, seq: lags[seq], speedup_at=2.0, merge_at=4.0,
+                             drop_at=8.0, max_rate=1.3, merge_max_words=6)
+
+
+@pytest.mark.parametrize("lag, rate", [
+    (0.0, 1.0),
+    (2.0, 1.0),  # at the speed-up threshold: still normal rate
+    (2.1, 1.0),  # quantized down to the nearest RATE_STEP
+    (2.3, 1.05),
+    (3.0, 1.15),
+    (4.0, 1.3),
+    (7.9, 1.3),  # merge band keeps the maximum rate
+    (8.0, 1.3),
+])
+def test_rate_rises_in_quantized_steps_up_to_max_rate(lag, rate):
+    assert controller({0: lag}).decide("hi", [0]) == rate
+
+
+def test_stale_sentences_are_dropped_and_counted():
+    latency = controller({0: 1.0, 1: 8.5})
+    assert latency.decide("hi", [0]) == 1.0
+    assert latency.decide("hi", [1, 2]) is None
+    assert latency.counts == {"sped_up": 0, "merged": 0, "dropped": 2}
+    assert latency.decisions[-1]["action"] == "drop" and latency.decisions[-1]["seqs"] == [1, 2]
+
+
+def test_rate_changes_are_recorded_once_and_sped_up_sentences_counted():
+    latency = controller({0: 3.0, 1: 3.0, 2: 1.0})
+    for seq in range(3):
+        latency.decide("hi", [seq])
+    assert [(d["action"], d["rate"]) for d in latency.decisions] == [("rate", 1.15), ("rate", 1.0)]
+    assert latency.counts["sped_up"] == 2
+    assert latency.rate["hi"] == 1.0
+
+
+def test_merge_only_from_merge_threshold_and_within_word_limit():
+    latency = controller({0: 3.9, 1: 4.0})
+    latency.decide("hi", [0])
+    assert not latency.should_merge("hi", "one two", "three")
+    latency.decide("hi", [1])
+    assert latency.should_merge("hi", "one two", "three four")
+    assert not latency.should_merge("hi", "one two three", "four five six seven")
+
+
+def test_merged_records_a_copy_of_the_sentences():
+    latency = controller({0: 5.0})
+    latency.decide("hi", [0])
+    seqs = [0, 1]
+    latency.merged("hi", seqs)
+    seqs.append(2)  # the pipeline keeps growing the job's list
+    assert latency.counts["merged"] == 1
+    assert latency.decisions[-1]["action"] == "merge" and latency.decisions[-1]["seqs"] == [0, 1]
@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+
+import pacer
+from pacer import HEADER, Pacer
+
+
+class RecordingSocket:
+    def __init__(self, clock):
+        self.clock = clock
+        self.sent = []  # (send time, packet number, seq, media_us, payload length)
+
+    async def send_bytes(self, data):
+        number, seq, media_us, _ = HEADER.unpack_from(data)
+        self.sent.append((round(self.clock[0], 3), number, seq, media_us, len(data) - HEADER.size))
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [100.0]
+    real_sleep = asyncio.sleep
+
+    async def sleep(seconds):
+        now[0] += seconds
+        await real_sleep(0)
+
+    monkeypatch.setattr(pacer.time, "monotonic", lambda: now[0])
+    monkeypatch.setattr(pacer.asyncio, "sleep", sleep)
+    return now
+
+
+def test_header_round_trip():
+    assert HEADER.size == 24
+    packed = HEADER.pack(0xFFFFFFFF, -1, 2 ** 40, 1700000000.25)
+    assert HEADER.unpack(packed) == (0xFFFFFFFF, -1, 2 ** 40, 1700000000.25)
+
+
+def test_pcm_repacketized_and_paced_lead_ahead_of_playback(clock):
+    socket = RecordingSocket(clock)
+    sender = Pacer(pcm=True, packet_ms=20, lead_ms=40, bytes_per_second=32000)
+    asyncio.run(sender.send(socket, bytes(32000 * 130 // 1000), 7, 0.13))
+    # 640-byte packets; the first lead_ms go out at once, then one per 20 ms of playback
+    assert [packet[0] - 100.0 for packet in socket.sent] == pytest.approx(
+        [0.0, 0.0, 0.0, 0.02, 0.04, 0.06, 0.08])
+    assert [packet[1] for packet in socket.sent] == list(range(7))
+    assert {packet[2] for packet in socket.sent} == {7}
+    assert [packet[3] for packet in socket.sent] == [i * 20000 for i in range(7)]
+    assert [packet[4] for packet in socket.sent] == [640] * 6 + [320]
+
+
+def test_clock_restarts_at_live_edge_after_idle(clock):
+    socket = RecordingSocket(clock)
+    sender = Pacer(pcm=False, packet_ms=20, lead_ms=0)
+
+    async def scenario():
+        await sender.send(socket, b"frame-a", None, 0.5)
+        await sender.send(socket, b"frame-b", 1, 0.5)
+        clock[0] += 5.0  # the queue ran dry
+        await sender.send(socket, b"frame-c", 2, 0.5)
+
+    asyncio.run(scenario())
+    # Compressed frames are sent whole, paced by their duration; no burst after the gap
+    assert [(packet[0] - 100.0, packet[2], packet[3]) for packet in socket.sent] == [
+        (0.0, -1, 0), (0.5, 1, 500000), (5.5, 2, 1000000)]
@@ -0,0 +1,125 @@
+import asyncio
+
+from fake_services import EchoTranslatorService, EchoTTSService, FixedController, InlineExecutor
+from pipeline import SentencePipeline, Sequencer
+from subtitles import SubtitleChannel
+from tracing import LatencyTracker
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def recording_sequencer():
+    released, completed = [], []
+
+    async def on_release(seq, chunk):
+        released.append((seq, chunk))
+
+    async def on_complete(seq):
+        completed.append(seq)
+
+    return Sequencer(on_release, on_complete), released, completed
+
+
+def test_out_of_order_completion_released_in_sequence_order():
+    async def scenario():
+        sequencer, released, completed = recording_sequencer()
+        await sequencer.complete(2, b"c")
+        await sequencer.complete(1, b"b")
+        assert released == [] and sequencer.waiting == 2
+        await sequencer.complete(0, b"a")
+        return released, completed, sequencer
+
+    released, completed, sequencer = run(scenario())
+    assert released == [(0, b"a"), (1, b"b"), (2, b"c")]
+    assert completed == [0, 1, 2]
+    assert sequencer.next_seq == 3 and sequencer.waiting == 0
+
+
+def test_head_chunks_stream_while_later_chunks_are_held():
+    async def scenario():
+        sequencer, released, _ = recording_sequencer()
+        await sequencer.push(1, b"b1")
+        await sequencer.push(0, b"a1")
+        await sequencer.push(0, b"a2")
+        assert released == [(0, b"a1"), (0, b"a2")]
+        await sequencer.push(1, b"b2")
+        await sequencer.complete(0)
+        return released
+
+    assert run(scenario()) == [(0, b"a1"), (0, b"a2"), (1, b"b1"), (1, b"b2")]
+
+
+def test_failed_sentence_completed_empty_does_not_block_later_ones():
+    async def scenario():
+        sequencer, released, completed = recording_sequencer()
+        await sequencer.complete(1, b"b")
+        await sequencer.complete(2, b"c")
+        # Sentence 0 failed (translation or TTS error): completed without audio
+        await sequencer.complete(0, b"")
+        return released, completed
+
+    released, completed = run(scenario())
+    assert released == [(1, b"b"), (2, b"c")]
+    assert completed == [0, 1, 2]
+
+
+def test_skipped_sentence_holds_later_ones_until_completed():
+    async def scenario():
+        sequencer, released, _ = recording_sequencer()
+        await sequencer.complete(0, b"a")
+        await sequencer.complete(2, b"c")
+        held = list(released)
+        await sequencer.complete(1, b"")
+        return held, released
+
+    held, released = run(scenario())
+    assert held == [(0, b"a")]
+    assert released == [(0, b"a"), (2, b"c")]
+
+
+def test_merged_sentences_share_one_cue_and_are_traced_as_synthesized():
+    async def scenario():
+        gate = asyncio.Event()
+        tracker = LatencyTracker()
+        subtitles = SubtitleChannel(["hi"])
+        audio, merges = [], []
+
+        async def on_audio(language, seq, chunk):
+            audio.append((seq, chunk))
+
+        async def on_sentence_end(language, seq):
+            subtitles.timing(language, seq, subtitles.started_at + seq, 1.0)
+
+        def on_merged(language, seqs):
+            merges.append(list(seqs))
+            subtitles.merge(language, seqs)
+
+        # TTS waits for the gate, so the first job stays busy while the next ones queue up
+        pipeline = SentencePipeline(EchoTranslatorService(), EchoTTSService(), InlineExecutor(gate), on_audio, ["hi"],
+                                    translate_concurrency=1, tts_concurrency=1, streaming=False,
+                                    on_sentence_end=on_sentence_end,
+                                    batch_window_ms=0, tracker=tracker, on_translated=subtitles.sentence,
+                                    controller=FixedController(merge=True), on_merged=on_merged)
+        listener = subtitles.subscribe("hi")
+        for seq, text in enumerate(["first.", "second.", "third."]):
+            tracker.begin(seq, text)
+            pipeline.submit(text)
+        for _ in range(10):
+            await asyncio.sleep(0)
+        gate.set()
+        await pipeline.drain()
+        await pipeline.close()
+        messages = []
+        while not listener.empty():
+            messages.append(listener.get_nowait())
+        return audio, merges, subtitles, tracker, messages
+
+    audio, merges, subtitles, tracker, messages = run(scenario())
+    assert merges == [[1, 2]]
+    assert audio == [(0, b"hi:first."), (1, b"hi:second. hi:third.")]
+    assert [cue.split("\n")[2] for cue in subtitles.archives["hi"].cues] == ["hi:first.", "hi:second. hi:third."]
+    timings = [(m["seq"], m["start"], m["end"]) for m in messages if m["type"] == "timing"]
+    assert timings[1:] == [(1, 1.0, 2.0), (2, 1.0, 2.0)]
+    assert all(tracker.trace(seq).get("synthesized", "hi") for seq in range(3))
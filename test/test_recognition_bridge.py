@@ -0,0 +1,33 @@
+import asyncio
+import threading
+
+from recognition_bridge import RecognitionBridge
+
+
+def test_finals_past_handoff_timeout_are_counted_once_by_the_loop():
+    async def scenario():
+        release = asyncio.Event()
+        handled = []
+
+        async def on_final(text, recognized_at):
+            await release.wait()
+            handled.append(text)
+
+        bridge = RecognitionBridge(on_final, max_pending=1, handoff_timeout=0.1)
+
+        def sdk_thread():
+            for text in ("one", "two", "three"):
+                bridge.recognized(text)
+
+        # "one" is being handled, "two" fills the queue and "three" times out waiting for room
+        thread = threading.Thread(target=sdk_thread)
+        thread.start()
+        await asyncio.to_thread(thread.join)
+        release.set()
+        await bridge.drain()
+        await bridge.close()
+        return handled, bridge.stats()
+
+    handled, stats = asyncio.run(scenario())
+    assert handled == ["one", "two"]
+    assert stats["finals"] == 2 and stats["dropped_finals"] == 1
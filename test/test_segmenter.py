@@ -0,0 +1,66 @@
+from segmenter import ClauseSegmenter, SentenceSegmenter, Segmenter, split_sentences
+
+import pytest
+
+
+def segment(text, segmenter=None):
+    segmenter = segmenter or SentenceSegmenter()
+    segments = segmenter.feed(text)
+    remaining = segmenter.flush()
+    return segments + [remaining] if remaining else segments
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Here am I. Send me.", ["Here am I.", "Send me."]),
+    ("The answer is no. We go on.", ["The answer is no.", "We go on."]),
+    ("Thank you Pastor Dan. Let us pray.", ["Thank you Pastor Dan.", "Let us pray."]),
+    ("Plan A. Then plan B.", ["Plan A.", "Then plan B."]),
+    ("Open to Rom. 8:28 with me.", ["Open to Rom. 8:28 with me."]),
+    ("Read 1 Sam. 3 and Dan. 9 tonight.", ["Read 1 Sam. 3 and Dan. 9 tonight."]),
+    ("Hymn No. 5 is next.", ["Hymn No. 5 is next."]),
+    ("Dr. Smith and J. Wesley spoke.", ["Dr. Smith and J. Wesley spoke."]),
+    ("We met at 9 a.m. today.", ["We met at 9 a.m. today."]),
+])
+def test_sentence_boundaries(text, expected):
+    assert segment(text) == expected
+
+
+def test_sentence_ending_in_a_completes_without_flush():
+    segmenter = SentenceSegmenter()
+    assert segmenter.feed("Plan A.") == ["Plan A."]
+    assert segmenter.pending == ""
+
+
+def test_trailing_reference_abbreviation_waits_for_next_feed():
+    segmenter = SentenceSegmenter()
+    assert segmenter.feed("Thank you Pastor Dan.") == []
+    assert segmenter.pending == "Thank you Pastor Dan."
+    assert segmenter.feed("Let us pray.") == ["Thank you Pastor Dan.", "Let us pray."]
+
+    assert segmenter.feed("Turn to Dan.") == []
+    assert segmenter.feed("9 with me.") == ["Turn to Dan. 9 with me."]
+
+
+def test_trailing_abbreviation_released_by_flush():
+    segmenter = SentenceSegmenter()
+    segmenter.feed("Thank you Pastor Dan.")
+    assert segmenter.flush() == "Thank you Pastor Dan."
+    assert segmenter.pending == ""
+
+
+def test_clause_segmenter_cuts_long_clauses_and_word_cap():
+    segmenter = ClauseSegmenter(clause_min_words=3, max_words=6, max_wait=None)
+    assert segmenter.feed("Hi, friends and family, welcome") == ["Hi, friends and family,"]
+    assert segmenter.feed("one two three four five") == ["welcome one two three four five"]
+
+
+def test_clause_segmenter_word_cap_applies_at_abbreviation():
+    segmenter = ClauseSegmenter(clause_min_words=None, max_words=3, max_wait=None)
+    assert segmenter.feed("Please welcome Dr. Smith today") == ["Please welcome Dr."]
+def test_split_sentences_keeps_trailing_fragment():
+    assert split_sentences("First one. Second") == ["First one.", "Second"]
+
+
+def test_segmenter_is_abstract():
+    with pytest.raises(TypeError):
+        Segmenter()
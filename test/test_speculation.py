@@ -0,0 +1,123 @@
+import asyncio
+
+from fake_services import EchoTranslatorService, EchoTTSService, FixedController, InlineExecutor
+from pipeline import SentencePipeline
+from speculation import Speculator
+
+LANGUAGES = ["hi", "te"]
+
+
+async def speculate(partials, final, translator, tts):
+    """
+    Feed partial hypotheses, let speculation finish, then reconcile against the final text.
+    """
+    speculator = Speculator(translator, tts, InlineExecutor(), LANGUAGES, stable_partials=2, min_words=3)
+    for partial in partials:
+        speculator.observe("", partial)
+    await asyncio.sleep(0)
+    await asyncio.gather(*(task for _, task in speculator._segments), return_exceptions=True)
+    return speculator, speculator.reconcile(final)
+
+
+async def run_pipeline(submissions, translator, tts):
+    audio = []
+
+    async def on_audio(language, seq, chunk):
+        audio.append((language, seq, chunk))
+
+    pipeline = SentencePipeline(translator, tts, InlineExecutor(), on_audio, LANGUAGES, streaming=False, batch_window_ms=0)
+    for text, speculative in submissions:
+        pipeline.submit(text, speculative=speculative)
+    await pipeline.drain()
+    await pipeline.close()
+    return audio
+
+
+def test_matching_final_reuses_speculative_audio():
+    async def scenario():
+        translator, tts = EchoTranslatorService(), EchoTTSService()
+        partials = ["we are gathered here and", "we are gathered here and we"]
+        speculator, (confirmed, remainder) = await speculate(
+            partials, "We are gathered here, and we pray.", translator, tts)
+        assert [clause for clause, _ in confirmed] == ["We are gathered here,"]
+        assert remainder == "and we pray."
+        assert speculator.stats() == {"launched": 1, "confirmed": 1, "cancelled": 0}
+        speculated_tts = list(tts.calls)
+
+        audio = await run_pipeline(confirmed + [(remainder, None)], translator, tts)
+        return speculated_tts, tts.calls, audio
+
+    speculated_tts, tts_calls, audio = asyncio.run(scenario())
+    assert speculated_tts == [("hi:we are gathered here", 1.0), ("te:we are gathered here", 1.0)]
+    # Only the remainder was synthesized after the final; the clause played its speculative audio
+    assert tts_calls[2:] == [("hi:and we pray.", 1.0), ("te:and we pray.", 1.0)]
+    assert ("hi", 0, b"hi:we are gathered here") in audio
+
+
+def test_diverging_final_discards_speculation_and_resynthesizes():
+    async def scenario():
+        translator, tts = EchoTranslatorService(), EchoTTSService()
+        partials = ["we are gathered here and", "we are gathered here and we"]
+        speculator, (confirmed, remainder) = await speculate(
+            partials, "We were gathered there, and we pray.", translator, tts)
+        assert confirmed == []
+        assert remainder == "We were gathered there, and we pray."
+        assert speculator.stats()["cancelled"] == 1
+        tts.calls.clear()
+
+        audio = await run_pipeline([(remainder, None)], translator, tts)
+        return tts.calls, audio
+
+    tts_calls, audio = asyncio.run(scenario())
+    assert tts_calls == [("hi:We were gathered there, and we pray.", 1.0),
+                         ("te:We were gathered there, and we pray.", 1.0)]
+    assert all(b"gathered here" not in chunk for _, _, chunk in audio)
+
+
+def test_revised_partial_cancels_speculation_before_final():
+    async def scenario():
+        translator, tts = EchoTranslatorService(), EchoTTSService()
+        speculator = Speculator(translator, tts, InlineExecutor(), LANGUAGES, stable_partials=2, min_words=3)
+        speculator.observe("", "we are gathered here and")
+        speculator.observe("", "we are gathered here and we")
+        task = speculator._segments[0][1]
+        speculator.observe("", "we are together")
+        speculator.observe("", "we are together now")
+        await asyncio.sleep(0)
+        return speculator, task
+
+    speculator, task = asyncio.run(scenario())
+    assert task.cancelled()
+    assert speculator.stats()["cancelled"] == 1
+
+
+async def speculative_run(rate):
+    translator, tts = EchoTranslatorService(), EchoTTSService()
+    _, (confirmed, remainder) = await speculate(
+        ["we are gathered here and", "we are gathered here and we"], "We are gathered here, and we pray.",
+        translator, tts)
+    tts.calls.clear()
+    audio = []
+
+    async def on_audio(language, seq, chunk):
+        audio.append((language, seq, chunk))
+
+    controller = FixedController(rate)
+    pipeline = SentencePipeline(translator, tts, InlineExecutor(), on_audio, LANGUAGES, streaming=False,
+                                batch_window_ms=0, controller=controller)
+    pipeline.submit(*confirmed[0])
+    await pipeline.drain()
+    await pipeline.close()
+    return controller, tts.calls, audio
+
+
+def test_speculative_audio_dropped_by_latency_controller():
+    controller, tts_calls, audio = asyncio.run(speculative_run(None))
+    assert controller.decided == [("hi", [0]), ("te", [0])]
+    assert tts_calls == [] and audio == []
+
+
+def test_speculative_audio_resynthesized_when_controller_speeds_up():
+    controller, tts_calls, audio = asyncio.run(speculative_run(1.2))
+    assert sorted(tts_calls) == [("hi:we are gathered here", 1.2), ("te:we are gathered here", 1.2)]
+    assert len(audio) == 2
@@ -0,0 +1,23 @@
+from subtitles import WebVTTArchive
+
+
+def test_archive_written_by_writer_thread(tmp_path):
+    path = tmp_path / "archive" / "room-en.vtt"
+    archive = WebVTTArchive(str(path))
+    archive.add(1, 0.0, 1.5, "First.")
+    archive.add(2, 1.5, 3.0, "A --> B.")
+    archive.close()
+    assert path.read_text(encoding="utf-8") == archive.document()
+    assert "A -> B." in archive.document()
+
+    archive.add(3, 3.0, 4.0, "Third.")
+    archive.close()
+    assert path.read_text(encoding="utf-8").count("WEBVTT") == 1
+    assert path.read_text(encoding="utf-8") == archive.document()
+
+
+def test_archive_without_cues_leaves_nothing_on_disk(tmp_path):
+    path = tmp_path / "room-en.vtt"
+    archive = WebVTTArchive(str(path))
+    archive.close()
+    assert not path.exists()
@@ -0,0 +1,29 @@
+import pytest
+
+import translation_service
+from translation_service import AzureTranslatorService
+
+
+@pytest.fixture
+def translator(monkeypatch):
+    monkeypatch.setattr(translation_service.config, "TRANSLATOR_BATCH_MAX_ITEMS", 3)
+    monkeypatch.setattr(translation_service.config, "TRANSLATOR_BATCH_MAX_CHARS", 10)
+    # _batches needs no client: skip __init__ (credentials, HTTP pools, warm-up)
+    return AzureTranslatorService.__new__(AzureTranslatorService)
+
+
+def test_batches_split_at_element_limit(translator):
+    assert translator._batches(["a"] * 7) == [[0, 1, 2], [3, 4, 5], [6]]
+
+
+def test_batches_split_at_character_limit_in_order(translator):
+    texts = ["abcd", "efgh", "ij", "klm", "nopqrstu", "v"]
+    batches = translator._batches(texts)
+    assert batches == [[0, 1, 2], [3], [4, 5]]
+    assert [i for batch in batches for i in batch] == list(range(len(texts)))
+    assert all(sum(len(texts[i]) for i in batch) <= 10 for batch in batches)
+
+
+def test_oversized_text_goes_alone(translator):
+    assert translator._batches(["ab", "x" * 25, "cd"]) == [[0], [1], [2]]
+    assert translator._batches([]) == []
@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+
+import tts_service
+from tts_service import SynthesizerPool
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    class Connection:
+        class disconnected:
+            @staticmethod
+            def connect(callback):
+                pass
+
+    monkeypatch.setattr(tts_service.speechsdk.Connection, "from_speech_synthesizer", lambda synthesizer: Connection())
+    pool = SynthesizerPool(["hi"], lambda language: object(), lambda language, synthesizer: None, size=1)
+    yield pool
+    pool.close()
+
+
+def test_lease_async_hands_synthesizer_to_next_waiter(pool):
+    async def user(order):
+        async with pool.lease_async("hi", timeout=2) as pooled:
+            order.append(pooled)
+            await asyncio.sleep(0.05)
+
+    async def scenario():
+        order = []
+        await asyncio.gather(*(user(order) for _ in range(3)))
+        return order
+
+    order = asyncio.run(scenario())
+    assert len(order) == 3 and len({id(pooled) for pooled in order}) == 1
+    assert pool.stats()["idle"] == {"hi": 1}
+
+
+def test_lease_async_times_out_while_all_busy(pool):
+    async def scenario():
+        async with pool.lease_async("hi"):
+            with pytest.raises(RuntimeError):
+                async with pool.lease_async("hi", timeout=0.1):
+                    pass
+
+    asyncio.run(scenario())
+    assert not any(pool._waiters.values())
+
+
+def test_failed_async_lease_is_replaced(pool):
+    async def scenario():
+        with pytest.raises(ValueError):
+            async with pool.lease_async("hi"):
+                raise ValueError("synthesis failed")
+
+    asyncio.run(scenario())
+    assert pool.replacements == 1
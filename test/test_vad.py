@@ -0,0 +1,50 @@
+from vad import SilenceDetector
+
+FRAME = 320  # 10 ms of 16 kHz 16-bit PCM
+SPEECH, SILENCE = b"\x01" * FRAME, b"\x00" * FRAME
+
+
+class FakeVad:
+    """
+    Any non-zero frame is speech.
+    """
+    def is_speech(self, frame, sample_rate):
+        return any(frame)
+
+
+def detector():
+    vad = SilenceDetector(frame_ms=10, pause_ms=50, hangover_ms=30, preroll_ms=20)
+    vad._vad = FakeVad()
+    return vad
+
+
+def test_pause_reported_once_per_silent_stretch_after_speech():
+    vad = detector()
+    assert vad.process(SILENCE * 10) == (SILENCE * 3, False)  # no speech yet: nothing to pause
+    forwarded, paused = vad.process(SPEECH * 3)
+    assert paused is False and vad.speaking
+    assert forwarded.startswith(SILENCE * 2)  # preroll before the onset
+
+    forwarded, paused = vad.process(SILENCE * 4)
+    assert forwarded == SILENCE * 3 and paused is False  # hangover forwarded, below pause threshold
+    forwarded, paused = vad.process(SILENCE)
+    assert forwarded == b"" and paused is True and not vad.speaking
+    assert vad.process(SILENCE * 20) == (b"", False)
+    assert vad.pauses == 1
+
+
+def test_speech_rearms_pause_and_replays_preroll():
+    vad = detector()
+    vad.process(SPEECH + SILENCE * 10)
+    assert vad.pauses == 1
+    forwarded, paused = vad.process(SPEECH)
+    assert forwarded == SILENCE * 2 + SPEECH and vad.speaking
+    forwarded, paused = vad.process(SILENCE * 5)
+    assert paused is True and vad.pauses == 2
+
+
+def test_partial_frames_carried_to_next_chunk():
+    vad = detector()
+    assert vad.process(SPEECH[:100]) == (b"", False)
+    assert vad.process(SPEECH[100:]) == (SPEECH, False)
+    assert vad.stats() == {"forwarded_seconds": 0.0, "skipped_seconds": 0.0, "pauses": 0}